@@ -1,84 +1,17 @@
-import pygame
-from queue import PriorityQueue
-
-def algorithm(draw, grid, start, end):
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    came_from = {}
-    g_score = {spot: float("inf") for row in grid for spot in row}
-    g_score[start] = 0
-    f_score = {spot: float("inf") for row in grid for spot in row}
-    f_score[start] = h(start.get_pos(), end.get_pos())
-
-    open_set_hash = {start}
-
-    while not open_set.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = open_set.get()[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            # reconstruct_path(came_from, end, draw)
-            reconstruct_path(came_from, current, draw) # Theta* alg.
-            end.make_end()
-            return True
-
-        for neighbor in get_neighbors(current, grid) : # Theta* alg.
-            if neighbor.is_barrier():
-                continue
-            
-            tentative_g_score = g_score[current] + h(current.get_pos(), neighbor.get_pos())
-
-            if tentative_g_score < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = tentative_g_score + h(neighbor.get_pos(), end.get_pos())
-                
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()
-        draw()
-
-        if current != start:
-            pass
-            # current.make_closed()
-
-    return False
-
-
-def h(p1, p2):
-    x1, y1 = p1
-    x2, y2 = p2
-    return abs(x1 - x2) + abs(y1 - y2)
-
-def get_neighbors(current, grid): # Theta* alg.
-    neighbors = []
-    row, col = current.get_pos()
-    rows, cols = len(grid), len(grid[0])
-
-    for i in range(-1, 2):
-        for j in range(-1, 2):
-            if i == 0 and j == 0:
-                continue
-            new_row, new_col = row + i, col + j
-            if 0 <= new_row < rows and 0 <= new_col < cols:
-                neighbor = grid[new_row][new_col]
-                if not neighbor.is_barrier():
-                    neighbors.append(neighbor)
-    
-    return neighbors
-
-def reconstruct_path(came_from, current, draw):
-    while current in came_from:
-        # print(current) # Add a way of printing/retrieving the pos for each grid that makes up the reconstructed path.
-        # Add code to update the grid to show the reconstructed path
-        current = came_from[current]
-        if not current.is_start():  # Ensure start block isn't modified
-            current.make_path()
-        draw()
+from algorithm import thetaStarAlgorithm, lazyThetaStarAlgorithm
+
+def algorithm(grid, start, end, observer=None, lazy=False):
+    """
+    Any-angle Theta* search (kept for older callers; the implementation lives in algorithm.py).
+    Args:
+        grid: The OccupancyGrid representing the environment.
+        start: (row, col) of the starting cell.
+        end: (row, col) of the goal cell.
+        observer: (Optional) SearchObserver notified of search progress.
+        lazy: Use Lazy Theta*, which defers line-of-sight checks until a node is expanded.
+    Returns:
+        A SearchResult whose path holds only the turn points, start and end.
+    """
+    if lazy:
+        return lazyThetaStarAlgorithm(grid, start, end, observer=observer)
+    return thetaStarAlgorithm(grid, start, end, observer=observer)
@@ -0,0 +1,131 @@
+"""
+Headless batch planning: load a map, run a file of queries with any of the planners
+and write one JSON line of results per query.
+
+Run with: python batch.py MAP QUERIES [-a ALGORITHM] [-o OUTPUT] [--no-paths] [--stats]
+
+MAP is a text grid, one line per row: '.' is free, any other character a barrier.
+A MovingAI .map file (header "type ... / height / width / map") works as well, with
+that format's passable terrain ('.', 'G' and the swamp 'S') free; trees 'T', water 'W'
+(only reachable from other water) and out-of-bounds '@'/'O' are barriers.
+
+QUERIES has one JSON object per line, e.g.
+    {"start": [0, 0], "end": [40, 12], "waypoints": [[10, 5]], "algorithm": "Theta*"}
+"waypoints", "algorithm" (default: the -a option) and "tour": true (visit the waypoints
+in the shortest order, see tour.py) are optional.
+
+Each output line holds the query number, the algorithm, whether a path was found,
+its length (cost), the number of cells, expansions, the time in seconds and the path
+as [row, col] pairs, or an "error" for queries that could not be run. --stats adds the
+search's SearchStats counters and timings as "stats".
+"""
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from algorithm import ALGORITHMS, plan
+from occupancy_grid import OccupancyGrid, BARRIER
+from search_result import SearchStats
+from tour import plan_tour
+
+FREE = "."
+MOVINGAI_FREE = ".GS"
+
+
+def load_map(path):
+    """Read a text or MovingAI map file into an OccupancyGrid."""
+    with open(path) as f:
+        lines = [line.rstrip("\n") for line in f]
+    free = FREE
+    if lines and lines[0].startswith("type"):
+        lines = lines[lines.index("map") + 1:]
+        free = MOVINGAI_FREE
+    lines = [line for line in lines if line]
+    if not lines:
+        raise ValueError(f"{path}: empty map")
+
+    rows, cols = len(lines), max(len(line) for line in lines)
+    grid = OccupancyGrid(rows, cols)
+    barriers = np.array([[char not in free for char in line.ljust(cols, FREE)] for line in lines])
+    grid.state[barriers] = BARRIER
+    grid.update_neighbors()  # The state array was written directly
+    return grid
+
+
+def read_queries(path):
+    """Yield the JSON objects of a queries file, skipping blank lines."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def run_query(grid, query, algorithm, include_path=True, include_stats=False):
+    """Plan one query; returns the output record as a dict."""
+    algorithm = query.get("algorithm", algorithm)
+    record = {"algorithm": algorithm}
+    try:
+        start = tuple(query["start"])
+        end = tuple(query["end"])
+        waypoints = [tuple(w) for w in query.get("waypoints", ())]
+        for point in [start, end] + waypoints:
+            if len(point) != 2 or not all(isinstance(c, int) for c in point):
+                raise ValueError(f"{list(point)} is not a [row, col] cell")
+    except (KeyError, TypeError, ValueError) as e:
+        record["error"] = f"bad query: {e!r}"
+        return record
+    for row, col in [start, end] + waypoints:
+        if not grid.in_bounds(row, col):
+            record["error"] = f"cell {[row, col]} is outside the {grid.rows}x{grid.cols} map"
+            return record
+        if grid.is_barrier(grid.index(row, col)):
+            record["error"] = f"cell {[row, col]} is a barrier"
+            return record
+    if algorithm not in ALGORITHMS:
+        record["error"] = f"unknown algorithm {algorithm!r}"
+        return record
+
+    stats = SearchStats() if include_stats else None
+    started = time.perf_counter()
+    if query.get("tour") and waypoints:
+        record["algorithm"] = "Tour"  # plan_tour always searches with Dijkstra
+        result = plan_tour(grid, start, end, waypoints, stats=stats)
+    else:
+        result = plan(grid, start, end, waypoints, algorithm, stats=stats)
+    elapsed = time.perf_counter() - started
+
+    record.update(found=bool(result), length=result.cost if result else None,
+                  cells=len(result.path) if result else 0, expansions=result.expansions, time=elapsed)
+    if include_path:
+        record["path"] = [list(cell) for cell in result.path] if result else None
+    if include_stats:
+        record["stats"] = stats.as_dict()
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan a file of queries on one map, without the UI.")
+    parser.add_argument("map", help="map file")
+    parser.add_argument("queries", help="JSON lines file of queries")
+    parser.add_argument("-a", "--algorithm", default="A*", choices=sorted(ALGORITHMS),
+                        help="planner for queries that don't name one (default: A*)")
+    parser.add_argument("-o", "--output", help="output file (default: standard output)")
+    parser.add_argument("--no-paths", action="store_true", help="leave the paths out of the output")
+    parser.add_argument("--stats", action="store_true", help="add search counters and timings to the output")
+    args = parser.parse_args(argv)
+
+    grid = load_map(args.map)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for number, query in enumerate(read_queries(args.queries)):
+            record = {"query": number}
+            record.update(run_query(grid, query, args.algorithm, not args.no_paths, args.stats))
+            out.write(json.dumps(record) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: bidirectional A* / Dijkstra against the one-directional searches on the
+same maps (open field, random fill, and a long serpentine corridor).
+Run with: python bench_bidirectional.py [grid size]
+"""
+import random
+import sys
+import time
+from occupancy_grid import OccupancyGrid
+from algorithm import aStarAlgorithm, dijkstraAlgorithm, bidirectionalAStar, bidirectionalDijkstra
+
+REPEATS = 3
+SEARCHES = (
+    ("A*", aStarAlgorithm),
+    ("Bidirectional A*", bidirectionalAStar),
+    ("Dijkstra", dijkstraAlgorithm),
+    ("Bidirectional Dijkstra", bidirectionalDijkstra),
+)
+
+
+def random_map(size, fill, seed=0):
+    rng = random.Random(seed)
+    grid = OccupancyGrid(size)
+    for row in range(size):
+        for col in range(size):
+            if rng.random() < fill:
+                grid.set_barrier(row, col)
+    # Keep the query endpoints (see main) free
+    for row, col in ((0, 0), (size - 1, size - 1), (size // 2, size // 8), (size // 2, size - 1 - size // 8)):
+        grid.reset(row, col)
+    return grid
+
+
+def corridor_map(size):
+    # Horizontal walls every other row with the gap alternating between the two ends,
+    # so the only route snakes through the whole map
+    grid = OccupancyGrid(size)
+    for row in range(1, size - 1, 2):
+        gap = size - 1 if row % 4 == 1 else 0
+        for col in range(size):
+            if col != gap:
+                grid.set_barrier(row, col)
+    return grid
+
+
+def time_search(search, grid, start, end):
+    best = float("inf")
+    for _ in range(REPEATS):
+        began = time.perf_counter()
+        result = search(grid, start, end)
+        best = min(best, time.perf_counter() - began)
+    return result, best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    # Corner to corner, and across the middle of the map (where a one-directional
+    # search's frontier can grow in every direction)
+    queries = (
+        ("corners", (0, 0), (size - 1, size - 1)),
+        ("middle", (size // 2, size // 8), (size // 2, size - 1 - size // 8)),
+    )
+    maps = (
+        ("open", random_map(size, 0.0)),
+        ("random 20%", random_map(size, 0.2)),
+        ("random 35%", random_map(size, 0.35)),
+        ("corridor", corridor_map(size)),
+    )
+
+    print(f"{'map':<14}{'query':<10}{'search':<24}{'cost':>8}{'expansions':>12}{'total ms':>12}")
+    for name, grid in maps:
+        for query, start, end in queries:
+            if grid.is_barrier(grid.index(*start)) or grid.is_barrier(grid.index(*end)):
+                continue
+            for label, search in SEARCHES:
+                result, elapsed = time_search(search, grid, start, end)
+                print(f"{name:<14}{query:<10}{label:<24}{result.cost:>8}{result.expansions:>12}{elapsed * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
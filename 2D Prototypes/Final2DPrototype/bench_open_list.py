@@ -0,0 +1,114 @@
+"""
+Micro-benchmark: cost per expansion of the OpenList searches against the previous
+queue.PriorityQueue + open_set_hash implementation.
+Run with: python bench_open_list.py [grid size]
+"""
+import random
+import sys
+import time
+from queue import PriorityQueue
+from occupancy_grid import OccupancyGrid
+from open_list import OpenList
+from algorithm import aStarAlgorithm, h
+
+REPEATS = 3
+
+
+def legacy_a_star(grid, start, end):
+    # The A* loop as it was before OpenList: a locking PriorityQueue, a parallel
+    # membership set and no decrease-key. Returns (cost, expansions).
+    start = grid.index(*start)
+    end = grid.index(*end)
+    end_pos = grid.pos(end)
+    count = 0
+    open_set = PriorityQueue()
+    open_set.put((0, count, start))
+    g_score = [float("inf")] * grid.size
+    g_score[start] = 0
+    open_set_hash = {start}
+    expansions = 0
+    while not open_set.empty():
+        current = open_set.get()[2]
+        open_set_hash.remove(current)
+        if current == end:
+            break
+        expansions += 1
+        for neighbor in grid.neighbors(current):
+            temp_g_score = g_score[current] + 1
+            if temp_g_score < g_score[neighbor]:
+                g_score[neighbor] = temp_g_score
+                if neighbor not in open_set_hash:
+                    count += 1
+                    open_set.put((temp_g_score + h(grid.pos(neighbor), end_pos), count, neighbor))
+                    open_set_hash.add(neighbor)
+    return g_score[end], expansions
+
+
+def new_a_star(grid, start, end):
+    result = aStarAlgorithm(grid, start, end)
+    return result.cost, result.expansions
+
+
+def make_map(size, fill, seed=0):
+    rng = random.Random(seed)
+    grid = OccupancyGrid(size)
+    for row in range(size):
+        for col in range(size):
+            if rng.random() < fill:
+                grid.set_barrier(row, col)
+    grid.reset(0, 0)
+    grid.reset(size - 1, size - 1)
+    return grid
+
+
+def time_search(search, grid, start, end):
+    best = float("inf")
+    for _ in range(REPEATS):
+        began = time.perf_counter()
+        cost, expansions = search(grid, start, end)
+        best = min(best, time.perf_counter() - began)
+    return cost, expansions, best
+
+
+def time_queue_ops(n):
+    # Raw push/pop cost of each structure, without any search around it
+    rng = random.Random(1)
+    priorities = [rng.random() for _ in range(n)]
+
+    began = time.perf_counter()
+    queue = PriorityQueue()
+    for node, priority in enumerate(priorities):
+        queue.put((priority, node, node))
+    while not queue.empty():
+        queue.get()
+    legacy = time.perf_counter() - began
+
+    began = time.perf_counter()
+    open_list = OpenList()
+    for node, priority in enumerate(priorities):
+        open_list.push(node, priority)
+    while open_list:
+        open_list.pop()
+    new = time.perf_counter() - began
+    return legacy, new
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    start, end = (0, 0), (size - 1, size - 1)
+
+    print(f"{'map':<16}{'impl':<16}{'cost':>8}{'expansions':>12}{'total ms':>12}{'us/expansion':>14}")
+    for name, fill in (("open", 0.0), ("random 20%", 0.2), ("random 35%", 0.35)):
+        grid = make_map(size, fill)
+        for impl, search in (("PriorityQueue", legacy_a_star), ("OpenList", new_a_star)):
+            cost, expansions, elapsed = time_search(search, grid, start, end)
+            per_expansion = elapsed / expansions * 1e6 if expansions else 0
+            print(f"{name:<16}{impl:<16}{cost:>8}{expansions:>12}{elapsed * 1e3:>12.1f}{per_expansion:>14.2f}")
+
+    n = size * size
+    legacy, new = time_queue_ops(n)
+    print(f"\n{n} push+pop pairs: PriorityQueue {legacy / n * 1e6:.2f} us, OpenList {new / n * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Benchmark suite: every planner in ALGORITHMS on seeded maps of each family (open,
+maze, random fill at several densities, rooms) with a fixed set of queries per map.
+Reports per map and planner: queries solved, the mean SearchStats counters per query
+(expansions, heap pushes and stale pops) and the largest open list, wall time
+percentiles, peak traced memory and path cost relative to the 4-connected optimum
+(Dijkstra), so any-angle and diagonal planners can come out below 1.
+
+Run with: python bench_suite.py [--size N] [--queries N] [--save] [--baseline FILE] [--tolerance T]
+Results are compared with the stored baseline (bench_baseline.json next to this file)
+when there is one; --save stores this run as the new baseline instead. The counters
+and costs are deterministic, so any change there is reported; times only when the
+median is more than --tolerance (default TIME_TOLERANCE) slower.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from occupancy_grid import OccupancyGrid, BARRIER
+from algorithm import ALGORITHMS, dijkstraAlgorithm
+from search_result import SearchStats
+
+REPEATS = 3  # Each query is timed this often; the best time counts
+TIME_TOLERANCE = 0.25
+COUNTERS = ("expansions", "pushes", "stale pops", "peak open")  # Deterministic, from SearchStats
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def open_map(size, seed):
+    return OccupancyGrid(size)
+
+
+def random_map(fill):
+    def generate(size, seed):
+        rng = random.Random(seed)
+        grid = OccupancyGrid(size)
+        grid.state[...] = [[BARRIER if rng.random() < fill else 0 for _ in range(size)] for _ in range(size)]
+        grid.update_neighbors()  # The state array was written directly
+        return grid
+    return generate
+
+
+def maze_map(size, seed):
+    # Depth-first backtracker: cells on even (row, col) are rooms, walls between them are knocked out
+    rng = random.Random(seed)
+    grid = OccupancyGrid(size)
+    grid.state[...] = BARRIER
+    stack = [(0, 0)]
+    grid.state[0, 0] = 0
+    while stack:
+        row, col = stack[-1]
+        options = [(row + dr, col + dc, dr, dc) for dr, dc in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 <= row + dr < size and 0 <= col + dc < size and grid.state[row + dr, col + dc] == BARRIER]
+        if not options:
+            stack.pop()
+            continue
+        next_row, next_col, dr, dc = rng.choice(options)
+        grid.state[row + dr // 2, col + dc // 2] = 0
+        grid.state[next_row, next_col] = 0
+        stack.append((next_row, next_col))
+    grid.update_neighbors()
+    return grid
+
+
+def rooms_map(size, seed, room=16):
+    # Square rooms separated by one-cell walls, with a door at a random spot of every wall
+    rng = random.Random(seed)
+    grid = OccupancyGrid(size)
+    for line in range(room, size, room):
+        grid.state[line, :] = BARRIER
+        grid.state[:, line] = BARRIER
+    for line in range(room, size, room):
+        for start in range(0, size, room):
+            stop = min(start + room, size)
+            if stop - start > 1:
+                grid.state[line, rng.randrange(start + 1, stop)] = 0
+                grid.state[rng.randrange(start + 1, stop), line] = 0
+    grid.update_neighbors()
+    return grid
+
+
+MAPS = (
+    ("open", open_map),
+    ("random 10%", random_map(0.1)),
+    ("random 20%", random_map(0.2)),
+    ("random 30%", random_map(0.3)),
+    ("maze", maze_map),
+    ("rooms", rooms_map),
+)
+
+
+def make_queries(grid, count, seed):
+    """
+    Seeded start/end pairs on free cells that are connected, with their optimal
+    4-connected cost (from Dijkstra).
+    """
+    rng = random.Random(seed)
+    free = [grid.pos(index) for index in range(grid.size) if not grid.is_barrier(index)]
+    queries = []
+    for _ in range(count * 20):
+        if len(queries) == count:
+            break
+        start, end = rng.choice(free), rng.choice(free)
+        result = dijkstraAlgorithm(grid, start, end)
+        if result and start != end:
+            queries.append((start, end, result.cost))
+    return queries
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def run_planner(search, grid, queries):
+    """Stats of one planner over a query set."""
+    # Round-robin over the queries (rather than repeating one query back to back), so
+    # planners that keep state between calls (D* Lite) don't just replay the last query;
+    # HPA*'s abstract graph is built once per map, during the first round
+    times = [float("inf")] * len(queries)
+    for _ in range(REPEATS):
+        results = []
+        for i, (start, end, _) in enumerate(queries):
+            began = time.perf_counter()
+            results.append(search(grid, start, end))
+            times[i] = min(times[i], time.perf_counter() - began)
+
+    ratios = [result.cost / optimum for result, (_, _, optimum) in zip(results, queries) if result]
+    solved = len(ratios)
+
+    # Memory and search counters in a separate pass: tracing and recording stats slow the
+    # searches down too much to time them
+    peak = 0
+    stats = []
+    for start, end, _ in queries:
+        stats.append(SearchStats())
+        tracemalloc.start()
+        search(grid, start, end, stats=stats[-1])
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "solved": solved,
+        "expansions": sum(s.expansions for s in stats) / len(stats),
+        "pushes": sum(s.pushes for s in stats) / len(stats),
+        "stale pops": sum(s.stale_pops for s in stats) / len(stats),
+        "peak open": max(s.peak_open for s in stats),
+        "p50 ms": percentile(times, 50) * 1e3,
+        "p90 ms": percentile(times, 90) * 1e3,
+        "p99 ms": percentile(times, 99) * 1e3,
+        "peak KiB": peak / 1024,
+        "cost ratio": sum(ratios) / len(ratios) if ratios else None,
+        "worst ratio": max(ratios) if ratios else None,
+    }
+
+
+def compare(results, baseline, tolerance=TIME_TOLERANCE):
+    """Differences of results from a baseline that count as regressions, as messages."""
+    problems = []
+    for key, stats in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for field in ("solved",) + COUNTERS + ("cost ratio", "worst ratio"):
+            if old[field] is not None and stats[field] is not None and abs(stats[field] - old[field]) > 1e-9:
+                problems.append(f"{key}: {field} changed {old[field]:.4g} -> {stats[field]:.4g}")
+        if stats["p50 ms"] > old["p50 ms"] * (1 + tolerance):
+            problems.append(f"{key}: p50 slower {old['p50 ms']:.2f} ms -> {stats['p50 ms']:.2f} ms")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark all 2D planners on seeded map families.")
+    parser.add_argument("--size", type=int, default=96, help="map side in cells (default: 96)")
+    parser.add_argument("--queries", type=int, default=20, help="queries per map (default: 20)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help="allowed median time increase as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    columns = ("solved",) + COUNTERS + ("p50 ms", "p90 ms", "p99 ms", "peak KiB", "cost ratio", "worst ratio")
+    print(f"{'map':<12}{'planner':<24}" + "".join(f"{column:>12}" for column in columns))
+    results = {}
+    for name, generate in MAPS:
+        grid = generate(args.size, args.seed)
+        queries = make_queries(grid, args.queries, args.seed)
+        for label, search in ALGORITHMS.items():
+            stats = results[f"{name} / {label}"] = run_planner(search, grid, queries)
+            print(f"{name:<12}{label:<24}" + "".join(
+                f"{'-' if stats[column] is None else format(stats[column], '.4g'):>12}" for column in columns))
+
+    # Results only compare with a baseline from the same settings
+    run = {"size": args.size, "queries": args.queries, "seed": args.seed, "results": results}
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=1)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if any(baseline[key] != run[key] for key in ("size", "queries", "seed")):
+        print("Baseline was recorded with other settings; not comparing.")
+        return
+    problems = compare(results, baseline["results"], args.tolerance)
+    for problem in problems:
+        print("REGRESSION", problem)
+    if problems:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import time
+import weakref
+from open_list import OpenList
+from search_result import SearchResult
+
+INF = float("inf")
+
+
+class DStarLite:
+    """
+    D* Lite incremental replanner on the 4-connected OccupancyGrid (unit move costs).
+    The search runs backwards from the goal and keeps its g/rhs values between queries,
+    so when barriers change or the start moves (the drone flew part of the route) only
+    the part of the search affected by the change is repaired.
+    Usage:
+        planner = DStarLite(grid, start, goal)
+        result = planner.replan()          # first call is a full search
+        grid.set_barrier(...)              # obstacles discovered in flight
+        planner.move_start(current_cell)
+        result = planner.replan()          # repairs only what the edits touched
+    """
+
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.goal = grid.index(*goal)
+        self.start = grid.index(*start)
+        self.last_start = self.start
+        self.km = 0  # Heuristic offset accumulated by start moves
+        self.version = grid.version
+        self.expansions = 0
+        self.refreshes = 0  # Pops whose key was out of date and were queued again
+        self.neighbors = grid.neighbors  # Swapped for a timed one while a replan records stats
+        self.reset()
+
+    def reset(self):
+        """Forget all search state (the next replan is a full search)."""
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.open_set = OpenList()
+        self.open_set.push(self.goal, self.calculate_key(self.goal))
+
+    def h(self, node):
+        # Manhattan distance from the current start (the search runs towards the start)
+        (r1, c1), (r2, c2) = self.grid.pos(self.start), self.grid.pos(node)
+        return abs(r1 - r2) + abs(c1 - c2)
+
+    def calculate_key(self, node):
+        best = min(self.g.get(node, INF), self.rhs.get(node, INF))
+        return best + self.h(node) + self.km, best
+
+    def move_start(self, start):
+        """The vehicle is now at `start` (row, col); keep the existing search tree."""
+        self.start = self.grid.index(*start)
+        (r1, c1), (r2, c2) = self.grid.pos(self.last_start), self.grid.pos(self.start)
+        self.km += abs(r1 - r2) + abs(c1 - c2)
+        self.last_start = self.start
+
+    def update_vertex(self, node):
+        if node != self.goal:
+            # One-step lookahead: best neighbor cost; barriers have no usable edges at all
+            if self.grid.is_barrier(node):
+                self.rhs[node] = INF
+            else:
+                g = self.g
+                self.rhs[node] = min((g.get(n, INF) + 1 for n in self.neighbors(node)), default=INF)
+
+        self.open_set.remove(node)
+        if self.g.get(node, INF) != self.rhs.get(node, INF):
+            self.open_set.push(node, self.calculate_key(node))
+
+    def apply_changes(self):
+        # Pull the barrier edits made since the last replan from the grid's edit log
+        changes = self.grid.changes_since(self.version)
+        self.version = self.grid.version
+        if changes is None:
+            self.reset()
+            return
+        for node in set(changes):
+            # The edited cell and every cell that could step into it have new edge costs.
+            # (A barrier's own links still list its free neighbors, so this covers both cases.)
+            self.update_vertex(node)
+            for neighbor in self.neighbors(node):
+                self.update_vertex(neighbor)
+
+    def compute_shortest_path(self, observer=None, stats=None):
+        open_set = self.open_set
+        g = self.g
+        rhs = self.rhs
+        start = self.start
+        while open_set:
+            if stats is not None:
+                # The heap only grows between pops, so its peak is seen here
+                stats.peak_open = max(stats.peak_open, len(open_set.heap))
+            top_key = open_set.peek_priority()
+            if top_key >= self.calculate_key(start) and rhs.get(start, INF) == g.get(start, INF):
+                # The start is consistent and nothing queued can improve it
+                break
+            node = open_set.pop()
+            new_key = self.calculate_key(node)
+            if top_key < new_key:
+                # Key is out of date (km changed since it was queued)
+                open_set.push(node, new_key)
+                self.refreshes += 1
+                continue
+
+            self.expansions += 1
+            if observer:
+                observer.on_expand(node)
+
+            if g.get(node, INF) > rhs.get(node, INF):
+                # Overconsistent: settle it and relax its neighbors
+                g[node] = rhs[node]
+                for neighbor in self.neighbors(node):
+                    self.update_vertex(neighbor)
+                    if observer:
+                        observer.on_open(neighbor)
+            else:
+                # Underconsistent: a cost went up, re-derive this node and its neighbors
+                g[node] = INF
+                self.update_vertex(node)
+                for neighbor in self.neighbors(node):
+                    self.update_vertex(neighbor)
+
+    def extract_path(self):
+        if self.g.get(self.start, INF) == INF:
+            return None
+        path = [self.start]
+        node = self.start
+        g = self.g
+        # Follow the cheapest neighbor down to the goal
+        while node != self.goal and len(path) <= self.grid.size:
+            node = min(self.grid.neighbors(node), key=lambda n: g.get(n, INF))
+            path.append(node)
+        if node != self.goal:
+            return None  # The walk hit the guard without reaching the goal
+        return path
+
+    def replan(self, observer=None, stats=None):
+        """
+        Bring the solution up to date with grid edits and the current start.
+        Returns a SearchResult; expansions (and stats, if given a SearchStats) count only
+        the work done by this call.
+        """
+        started = time.perf_counter()
+        self.expansions = 0
+        self.refreshes = 0
+        if stats is None:
+            self.apply_changes()
+            self.compute_shortest_path(observer)
+        else:
+            # The open list lives across replans: count the difference this call made
+            open_set = self.open_set
+            pushes, pops = open_set.pushes, open_set.pops
+            self.neighbors = stats.timed(self.grid.neighbors, "neighbor_time")
+            try:
+                self.apply_changes()
+                self.compute_shortest_path(observer, stats)
+            finally:
+                self.neighbors = self.grid.neighbors
+            if self.open_set is open_set:  # Not reset by apply_changes
+                stats.pushes += open_set.pushes - pushes
+                stats.stale_pops += open_set.pops - pops - self.expansions - self.refreshes
+            else:
+                stats.pushes += self.open_set.pushes
+                stats.stale_pops += self.open_set.pops - self.expansions - self.refreshes
+            stats.expansions += self.expansions
+
+        path = self.extract_path()
+        if observer:
+            observer.on_path(path or [])
+        if path is not None:
+            path = [self.grid.pos(node) for node in path]
+        cost = self.g.get(self.start, INF) if path is not None else INF
+        return SearchResult(path, cost, self.expansions, time.perf_counter() - started, stats)
+
+
+# One replanner per grid, reused while the goal stays the same
+_replanners = weakref.WeakKeyDictionary()
+
+
+def dStarLiteAlgorithm(grid, start, end, waypoints=None, observer=None, stats=None):
+    """
+    Plan with D* Lite, reusing the search state of the previous call on the same grid
+    and goal. Later calls only repair what barrier edits and start moves changed.
+    """
+    planner = _replanners.get(grid)
+    if planner is None or planner.goal != grid.index(*end):
+        planner = DStarLite(grid, start, end)
+        _replanners[grid] = planner
+    else:
+        planner.move_start(start)
+    return planner.replan(observer, stats)
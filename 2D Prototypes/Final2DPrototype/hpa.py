@@ -0,0 +1,269 @@
+import time
+import weakref
+from collections import deque
+from open_list import OpenList, TrackedOpenList
+from search_result import SearchResult
+
+INF = float("inf")
+
+CLUSTER_SIZE = 10
+# Border runs at least this long get an entrance at each end instead of one in the middle
+LONG_ENTRANCE = 6
+
+
+class HPAGraph:
+    """
+    Hierarchical path-finding (HPA*) abstraction of a 4-connected OccupancyGrid.
+    The grid is cut into CLUSTER_SIZE x CLUSTER_SIZE clusters. Where two neighboring
+    clusters share a run of free cells along their border, entrances are placed (a cell
+    on each side, one step apart). Inside every cluster the shortest paths between its
+    entrance cells are precomputed. A query then only searches this small abstract graph
+    (plus the start and goal linked into their clusters) and stitches the stored paths.
+    Paths are near-optimal: they are optimal over the entrance cells, not over all cells.
+    When barriers change, only the clusters around the edited cells are rebuilt.
+    """
+
+    def __init__(self, grid, cluster_size=CLUSTER_SIZE):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        self.version = grid.version
+
+        self.borders = {}  # (cluster, cluster to the right or below) -> [(cell, cell), ...]
+        self.inter = {}  # entrance cell -> set of entrance cells one step away in another cluster
+        self.intra = {}  # cluster -> {cell: {other cell: (cost, path)}}
+        self.build()
+
+    def cluster_of(self, index):
+        row, col = self.grid.pos(index)
+        return row // self.cluster_size, col // self.cluster_size
+
+    def bounds(self, cluster):
+        size = self.cluster_size
+        row, col = cluster
+        return row * size, min((row + 1) * size, self.grid.rows), col * size, min((col + 1) * size, self.grid.cols)
+
+    def build(self):
+        """Build the whole abstract graph from scratch."""
+        self.borders.clear()
+        self.inter.clear()
+        self.intra.clear()
+        clusters = [(row, col) for row in range(self.cluster_rows) for col in range(self.cluster_cols)]
+        for cluster in clusters:
+            for other in ((cluster[0], cluster[1] + 1), (cluster[0] + 1, cluster[1])):
+                if other[0] < self.cluster_rows and other[1] < self.cluster_cols:
+                    self.build_border(cluster, other)
+        for cluster in clusters:
+            self.build_cluster(cluster)
+        self.version = self.grid.version
+
+    def build_border(self, cluster, other):
+        # Drop the old entrances of this border from the inter-cluster links
+        for cell, other_cell in self.borders.pop((cluster, other), ()):
+            self._unlink(cell, other_cell)
+            self._unlink(other_cell, cell)
+
+        grid = self.grid
+        top, bottom, left, right = self.bounds(cluster)
+        if other[1] > cluster[1]:
+            # Vertical border: cluster's last column against other's first column
+            pairs = [(grid.index(row, right - 1), grid.index(row, right)) for row in range(top, bottom)]
+        else:
+            # Horizontal border: cluster's last row against other's first row
+            pairs = [(grid.index(bottom - 1, col), grid.index(bottom, col)) for col in range(left, right)]
+
+        entrances = []
+        run = []
+        for cell, other_cell in pairs + [(None, None)]:
+            if cell is not None and not grid.is_barrier(cell) and not grid.is_barrier(other_cell):
+                run.append((cell, other_cell))
+                continue
+            if run:
+                if len(run) >= LONG_ENTRANCE:
+                    entrances += [run[0], run[-1]]
+                else:
+                    entrances.append(run[len(run) // 2])
+                run = []
+
+        self.borders[(cluster, other)] = entrances
+        for cell, other_cell in entrances:
+            self.inter.setdefault(cell, set()).add(other_cell)
+            self.inter.setdefault(other_cell, set()).add(cell)
+
+    def _unlink(self, cell, other_cell):
+        links = self.inter.get(cell)
+        if links is not None:
+            links.discard(other_cell)
+            if not links:
+                del self.inter[cell]
+
+    def entrance_cells(self, cluster):
+        cells = set()
+        for other in self.neighbor_clusters(cluster):
+            key = (cluster, other) if other > cluster else (other, cluster)
+            for cell, other_cell in self.borders.get(key, ()):
+                cells.add(cell if other > cluster else other_cell)
+        return cells
+
+    def neighbor_clusters(self, cluster):
+        row, col = cluster
+        for other in ((row, col + 1), (row + 1, col), (row, col - 1), (row - 1, col)):
+            if 0 <= other[0] < self.cluster_rows and 0 <= other[1] < self.cluster_cols:
+                yield other
+
+    def build_cluster(self, cluster):
+        """Shortest in-cluster paths between all entrance cells of a cluster."""
+        cells = self.entrance_cells(cluster)
+        edges = {}
+        for cell in cells:
+            paths = self.cluster_paths(cluster, cell, cells)
+            edges[cell] = {other: (len(path) - 1, path) for other, path in paths.items() if other != cell}
+        self.intra[cluster] = edges
+
+    def cluster_paths(self, cluster, source, targets):
+        """Breadth-first search from source that stays inside the cluster; paths to the targets it reaches."""
+        grid = self.grid
+        top, bottom, left, right = self.bounds(cluster)
+        cols = grid.cols
+        came_from = {source: None}
+        queue = deque([source])
+        remaining = set(targets)
+        remaining.discard(source)
+        while queue and remaining:
+            current = queue.popleft()
+            for neighbor in grid.neighbors(current):
+                row, col = divmod(neighbor, cols)
+                if neighbor not in came_from and top <= row < bottom and left <= col < right:
+                    came_from[neighbor] = current
+                    remaining.discard(neighbor)
+                    queue.append(neighbor)
+
+        paths = {}
+        for target in targets:
+            if target in came_from:
+                path = [target]
+                while came_from[path[-1]] is not None:
+                    path.append(came_from[path[-1]])
+                paths[target] = path[::-1]
+        return paths
+
+    def update(self):
+        """Rebuild the clusters touched by barrier edits since the last update."""
+        changes = self.grid.changes_since(self.version)
+        if changes is None:
+            self.build()
+            return
+        self.version = self.grid.version
+        if not changes:
+            return
+
+        # The edited clusters' borders can gain or lose entrances, which changes the
+        # entrance cells (and so the in-cluster paths) of the clusters across them too
+        dirty = {self.cluster_of(index) for index in set(changes)}
+        rebuilt = set(dirty)
+        for cluster in dirty:
+            for other in self.neighbor_clusters(cluster):
+                self.build_border(min(cluster, other), max(cluster, other))
+                rebuilt.add(other)
+        for cluster in rebuilt:
+            self.build_cluster(cluster)
+
+    def find_path(self, start, end, observer=None, stats=None):
+        """
+        Plan from start to end (flat indices) over the abstract graph.
+        Returns (path as flat indices or None, cost, expansions). With a SearchStats,
+        neighbor_time is the time spent linking the start and end into their clusters.
+        """
+        self.update()
+        if self.grid.is_barrier(start) or self.grid.is_barrier(end):
+            return None, INF, 0
+        if start == end:
+            return [start], 0, 0
+
+        # Link the start and end into their clusters' entrance cells
+        linking = time.perf_counter() if stats is not None else 0
+        start_cluster = self.cluster_of(start)
+        end_cluster = self.cluster_of(end)
+        start_edges = self.cluster_paths(start_cluster, start, self.entrance_cells(start_cluster) | {end})
+        end_edges = {cell: path[::-1] for cell, path in
+                     self.cluster_paths(end_cluster, end, self.entrance_cells(end_cluster)).items()}
+        if stats is not None:
+            stats.neighbor_time += time.perf_counter() - linking
+
+        end_row, end_col = self.grid.pos(end)
+        cols = self.grid.cols
+
+        def h(node):
+            row, col = divmod(node, cols)
+            return abs(row - end_row) + abs(col - end_col)
+
+        open_set = OpenList() if stats is None else TrackedOpenList()
+        open_set.push(start, h(start))
+        g_score = {start: 0}
+        came_from = {}  # node -> (previous node, cells from previous to node)
+        expansions = 0
+        while open_set:
+            current = open_set.pop()
+            if current == end:
+                break
+            expansions += 1
+            if observer:
+                observer.on_expand(current)
+
+            if current == start:
+                edges = [(cell, len(path) - 1, path) for cell, path in start_edges.items() if cell != start]
+            else:
+                cluster = self.cluster_of(current)
+                edges = [(cell, cost, path) for cell, (cost, path) in self.intra[cluster].get(current, {}).items()]
+            edges += [(cell, 1, [current, cell]) for cell in self.inter.get(current, ())]
+            if current in end_edges:
+                edges.append((end, len(end_edges[current]) - 1, end_edges[current]))
+
+            for neighbor, cost, path in edges:
+                temp_g_score = g_score[current] + cost
+                if temp_g_score < g_score.get(neighbor, INF):
+                    g_score[neighbor] = temp_g_score
+                    came_from[neighbor] = (current, path)
+                    open_set.push(neighbor, temp_g_score + h(neighbor))
+                    if observer:
+                        observer.on_open(neighbor)
+
+        if stats is not None:
+            stats.expansions += expansions
+            stats.add_open_list(open_set)
+        if end not in g_score:
+            return None, INF, expansions
+
+        # Refine: stitch the stored cell paths of the abstract edges
+        segments = []
+        node = end
+        while node != start:
+            node, path = came_from[node]
+            segments.append(path)
+        path = [start]
+        for segment in reversed(segments):
+            path.extend(segment[1:])
+        return path, g_score[end], expansions
+
+
+# One abstract graph per grid, kept up to date with its edits
+_graphs = weakref.WeakKeyDictionary()
+
+
+def hpaAlgorithm(grid, start, end, waypoints=None, observer=None, stats=None):
+    """
+    Plan with HPA* (see HPAGraph). The abstract graph is built on the first call for a
+    grid and then only updated around edited cells.
+    """
+    started = time.perf_counter()
+    graph = _graphs.get(grid)
+    if graph is None:
+        graph = _graphs[grid] = HPAGraph(grid)
+
+    path, cost, expansions = graph.find_path(grid.index(*start), grid.index(*end), observer, stats)
+    if observer:
+        observer.on_path(path or [])
+    if path is not None:
+        path = [grid.pos(node) for node in path]
+    return SearchResult(path, cost, expansions, time.perf_counter() - started, stats)
@@ -0,0 +1,62 @@
+import math
+
+
+class LegCache:
+    """
+    Results of single start -> end searches (route legs) on one OccupancyGrid, keyed by
+    (algorithm, start, end) and stamped with the map version they were valid for.
+    When the map has changed since, a leg is only thrown away if an edit could have
+    changed it, using the grid's edit log:
+        - a new barrier on a cell the leg's path covers breaks the path;
+        - a cleared barrier can only help if a path through it could be shorter, i.e. if
+          the straight-line distance start -> cell -> end is below the leg's cost.
+    Every other leg is kept and its version stamp moved forward.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.legs = {}  # (algorithm, start, end) -> [version, SearchResult, footprint]
+
+    def __len__(self):
+        return len(self.legs)
+
+    def get(self, algorithm, start, end):
+        """The cached SearchResult for this leg if it is still valid, else None."""
+        key = (algorithm, tuple(start), tuple(end))
+        entry = self.legs.get(key)
+        if entry is None:
+            return None
+        if entry[0] != self.grid.version:
+            if not self._still_valid(entry, start, end):
+                del self.legs[key]
+                return None
+            entry[0] = self.grid.version
+        return entry[1]
+
+    def put(self, algorithm, start, end, result, cells):
+        """
+        Store a leg's SearchResult. `cells` are all the (row, col) cells its path covers
+        (for any-angle paths, every cell the segments cross).
+        """
+        footprint = {self.grid.index(*cell) for cell in cells}
+        self.legs[(algorithm, tuple(start), tuple(end))] = [self.grid.version, result, footprint]
+
+    def clear(self):
+        self.legs.clear()
+
+    def _still_valid(self, entry, start, end):
+        version, result, footprint = entry
+        changes = self.grid.changes_since(version)
+        if changes is None:
+            return False  # The whole map was rebuilt
+
+        for index in set(changes):
+            if self.grid.is_barrier(index):
+                if index in footprint:
+                    return False
+            else:
+                cell = self.grid.pos(index)
+                detour = math.dist(start, cell) + math.dist(cell, end)
+                if detour < result.cost - 1e-9:
+                    return False
+        return True
@@ -2,8 +2,13 @@ import pygame
 import sys
 import pygame_gui
 import os
+import numpy as np
 from spot import *
 from algorithm import *
+from occupancy_grid import OccupancyGrid
+from observer import GridPainter
+from tour import plan_tour
+from path_cache import PathCache
 import time
 from middleware import *
 
@@ -26,6 +31,10 @@ CLOCK = pygame.time.Clock()
 
 GRID_SIZE = 20
 
+SEARCH_FPS = 30  # Redraw rate while a search is being animated
+
+PATH_CACHE = PathCache(maxsize=64)  # Repeated Calculate presses on an unchanged map are answered from here
+
 SELECT_NONE = 0
 SELECT_START = 1
 SELECT_END = 2
@@ -34,7 +43,7 @@ SELECT_WAYPOINT = 4
 
 selected_type = SELECT_NONE
 
-optionsList = ["A*", "Theta*", "Dijkstra", "Theta* (NoDiagonals)", "A*+JPS"]
+optionsList = ["A*", "Theta*", "Lazy Theta*", "Dijkstra", "Theta* (NoDiagonals)", "A*+JPS", "A*+JPS (Diagonals)", "D* Lite", "Bidirectional A*", "Bidirectional Dijkstra", "HPA*"]
 
 
 SIZE_INPUT = pygame_gui.elements.UITextEntryLine(relative_rect=pygame.Rect((800, 100), (400, 50)), manager=MANAGER, object_id="#main_text_entry")
@@ -44,17 +53,15 @@ BARRIER_BUTTON = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((800, 40
 CALCULATE_BUTTON = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((800, 500), (100, 50)), text="Calculate", manager=MANAGER)
 CLEAR_BUTTON = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((1000, 500), (100, 50)), text="Clear", manager=MANAGER)
 WAYPOINT_BUTTON = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((1000, 200), (100, 50)), text="Waypoint", manager=MANAGER)
+TOUR_BUTTON = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((1000, 400), (100, 50)), text="Tour", manager=MANAGER)
 MODEL_DROPDOWN = pygame_gui.elements.UIDropDownMenu(relative_rect=pygame.Rect((1000, 300), (100, 50)), options_list=optionsList, starting_option="A*")
 
 def make_grid(rows, width):
-    grid = []
-    gap = width / rows
-    for i in range(rows):
-        grid.append([])
-        for j in range(rows):
-            spot = Spot(i, j, gap, rows)
-            grid[i].append(spot)
-    return grid
+    return OccupancyGrid(rows)
+
+def get_spot(grid, row, col, width):
+    # Spots are views over the occupancy grid, created only when the UI needs one
+    return Spot(grid, row, col, width / grid.rows, grid.rows)
 
 def draw_grid(win, rows, width):
     gap = width / rows
@@ -67,9 +74,8 @@ def draw_grid(win, rows, width):
 
 def draw(win, grid, rows, width):
     win.fill(WHITE)  # Clear the screen with white
-    for row in grid:
-        for spot in row:
-            spot.draw(win)
+    for row, col in zip(*np.nonzero(grid.state)):  # Empty cells are already white
+        get_spot(grid, int(row), int(col), width).draw(win)
     draw_grid(win, rows, width)  # Draw grid lines
 
     grid_text = font.render(f"Grid size: " +  str(GRID_SIZE), True, BLACK)
@@ -84,6 +90,14 @@ def get_clicked_pos(pos, rows, width):
 
     return row, col
 
+def draw_search(win, grid, rows, width):
+    # Keep the window responsive while a search is running
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            pygame.quit()
+    draw(win, grid, rows, width)
+    pygame.display.update()
+
 def adjustSelect(button):
     buttons = [START_BUTTON, END_BUTTON, BARRIER_BUTTON, WAYPOINT_BUTTON, CALCULATE_BUTTON]
     button.select()
@@ -157,35 +171,27 @@ def main():
                 elif event.ui_element == CLEAR_BUTTON:
                     start = None
                     end = None
+                    waypoints = []
                     processing_time = None
                     grid = make_grid(GRID_SIZE, GRID_WIDTH)
                 elif event.ui_element == CALCULATE_BUTTON and start and end:
-                    for row in grid:
-                        for spot in row:
-                            if spot.color == PURPLE:
-                                spot.reset()
-                            elif spot.color == GREEN:
-                                spot.reset()
+                    grid.clear_search_marks()
                     startTime = time.time()
-                    for row in grid:
-                        for spot in row:
-                            spot.update_neighbors(grid)
-                    if (selectedModel == "A*"):
-                        aStarAlgorithm(lambda: draw(SCREEN, grid, GRID_SIZE, GRID_WIDTH), grid, start, end, waypoints)
-                    elif (selectedModel == "Theta*"):
-                        thetaStarAlgorithm(lambda: draw(SCREEN, grid, GRID_SIZE, GRID_WIDTH), grid, start, end, waypoints)
-                    elif (selectedModel == "Dijkstra"):
-                        dijkstraAlgorithm(lambda: draw(SCREEN, grid, GRID_SIZE, GRID_WIDTH), grid, start, end, waypoints)
-                    elif (selectedModel == "Theta* (NoDiagonals)"):
-                        thetaStarAlgorithmNoDiagonals(lambda: draw(SCREEN, grid, GRID_SIZE, GRID_WIDTH), grid, start, end,
-                                          waypoints)
-                    elif (selectedModel == "A*+JPS"):
-                        aStarJPS(lambda: draw(SCREEN, grid, GRID_SIZE, GRID_WIDTH), grid, start, end,
-                                          waypoints)
+                    # Animate the search at a bounded frame rate so drawing doesn't dominate planning time
+                    painter = GridPainter(grid, lambda: draw_search(SCREEN, grid, GRID_SIZE, GRID_WIDTH), fps=SEARCH_FPS)
+                    PATH_CACHE.plan(grid, start.get_pos(), end.get_pos(), [w.get_pos() for w in waypoints if w.is_waypoint()], selectedModel, painter)
                     endTime = time.time()
                     processing_time = endTime - startTime
                     # print("Processing time: " + str(processing_time) + "s")
                     pathToText()
+                elif event.ui_element == TOUR_BUTTON and start and end:
+                    # Visit all waypoints in the shortest order found (not the order they were placed)
+                    grid.clear_search_marks()
+                    startTime = time.time()
+                    painter = GridPainter(grid, lambda: draw_search(SCREEN, grid, GRID_SIZE, GRID_WIDTH), fps=SEARCH_FPS)
+                    plan_tour(grid, start.get_pos(), end.get_pos(), [w.get_pos() for w in waypoints if w.is_waypoint()], painter)
+                    processing_time = time.time() - startTime
+                    pathToText()
 
 
 
@@ -196,7 +202,7 @@ def main():
                     pos = pygame.mouse.get_pos()
                     if pos[0] < GRID_WIDTH:  # Only allow interaction within the grid
                         row, col = get_clicked_pos(pos, GRID_SIZE, GRID_WIDTH)
-                        spot = grid[row][col]
+                        spot = get_spot(grid, row, col, GRID_WIDTH)
                         if selected_type == SELECT_START:
                             if start:
                                 start.reset()
@@ -220,7 +226,7 @@ def main():
                     pos = pygame.mouse.get_pos()
                     if pos[0] < GRID_WIDTH:  # Only allow interaction within the grid
                         row, col = get_clicked_pos(pos, GRID_SIZE, GRID_WIDTH)
-                        spot = grid[row][col]
+                        spot = get_spot(grid, row, col, GRID_WIDTH)
                         spot.reset()
 
             elif event.type == pygame.MOUSEBUTTONUP:
@@ -233,7 +239,7 @@ def main():
                     pos = pygame.mouse.get_pos()
                     if pos[0] < GRID_WIDTH:
                         row, col = get_clicked_pos(pos, GRID_SIZE, GRID_WIDTH)
-                        spot = grid[row][col]
+                        spot = get_spot(grid, row, col, GRID_WIDTH)
                         if selected_type == SELECT_BARRIER:
                             if spot != start and spot != end:
                                 spot.make_barrier()
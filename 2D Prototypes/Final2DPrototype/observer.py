@@ -0,0 +1,69 @@
+import time
+from occupancy_grid import EMPTY, OPEN, CLOSED, PATH
+
+
+class SearchObserver:
+    """
+    Receives events from a running search. Searches only call an observer when one
+    is passed in, so planning without one does no rendering work at all.
+    Nodes are flat cell indices of the occupancy grid.
+    """
+
+    def on_open(self, node):
+        """A node was added to the open set."""
+
+    def on_expand(self, node):
+        """A node was taken off the open set and expanded."""
+
+    def on_path(self, path):
+        """The search finished; path is the list of nodes from start to end (empty if none)."""
+
+
+class GridPainter(SearchObserver):
+    """
+    Marks the search frontier and final path on the grid and calls draw() to animate it.
+    Redraws are throttled: every `every` expansions, or at most `fps` times a second
+    when fps is given.
+    Args:
+        grid: The OccupancyGrid being searched.
+        draw: Function that renders the grid (e.g., the pygame draw function).
+        every: Number of expansions between redraws.
+        fps: (Optional) Target redraw rate; overrides `every`.
+        show_closed: Also color expanded nodes.
+    """
+
+    def __init__(self, grid, draw, every=1, fps=None, show_closed=False):
+        self.grid = grid
+        self.draw = draw
+        self.every = every
+        self.interval = 1 / fps if fps else None
+        self.show_closed = show_closed
+        self.expansions = 0
+        self.last_draw = time.perf_counter()
+
+    def _mark(self, node, state):
+        # Only color free cells, so start, end and waypoints keep their markings
+        if self.grid.get_state(node) in (EMPTY, OPEN, CLOSED):
+            self.grid.set_state(node, state)
+
+    def on_open(self, node):
+        self._mark(node, OPEN)
+
+    def on_expand(self, node):
+        if self.show_closed:
+            self._mark(node, CLOSED)
+
+        self.expansions += 1
+        if self.interval is not None:
+            now = time.perf_counter()
+            if now - self.last_draw < self.interval:
+                return
+            self.last_draw = now
+        elif self.expansions % self.every:
+            return
+        self.draw()
+
+    def on_path(self, path):
+        for node in path:
+            self._mark(node, PATH)
+        self.draw()
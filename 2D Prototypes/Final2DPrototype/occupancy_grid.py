@@ -0,0 +1,164 @@
+import numpy as np
+
+# Cell states stored in the uint8 state array. They replace the RGB colors each
+# Spot used to hold; spot.py maps them back to colors for drawing.
+EMPTY = 0
+BARRIER = 1
+START = 2
+END = 3
+WAYPOINT = 4
+OPEN = 5
+CLOSED = 6
+PATH = 7
+
+# Neighbor directions as (d_row, d_col). Bit i of a cell's link mask is set when
+# the neighbor in DIRECTIONS[i] exists and is not a barrier. The first four are the
+# straight moves (same order Spot.update_neighbors used), the last four diagonals.
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+DIRECTION_BITS = {direction: 1 << bit for bit, direction in enumerate(DIRECTIONS)}
+STRAIGHT_MASK = 0x0F
+
+MASK64 = (1 << 64) - 1
+
+
+def cell_hash(index):
+    """Pseudo-random 64-bit key of a cell (splitmix64), XORed into the grid fingerprint."""
+    z = (index + 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def cell_hashes(indices):
+    """cell_hash for a numpy array of indices (uint64 arithmetic wraps like the masks above)."""
+    z = indices.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class OccupancyGrid:
+    """
+    Compact occupancy grid for the 2D planner (no pygame needed).
+    Every cell is one byte of state, addressed either by (row, col) or by its flat
+    index row * cols + col, which is what the search algorithms use as node ids.
+    The neighbor link masks are kept up to date as cells change, so there is nothing
+    to rebuild before a search.
+    """
+
+    def __init__(self, rows, cols=None):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.size = self.rows * self.cols
+
+        # The bytearrays are the backing store: indexing them from Python is much
+        # cheaper than indexing a numpy array. The numpy views share the same memory
+        # and are used for vectorized work (neighbor rebuilds, drawing, resets).
+        self.cells = bytearray(self.size)
+        self.state = np.frombuffer(self.cells, dtype=np.uint8).reshape(self.rows, self.cols)
+        self.links = bytearray(self.size)
+        self.link_state = np.frombuffer(self.links, dtype=np.uint8).reshape(self.rows, self.cols)
+
+        # For each direction bit: flat-index offset to that neighbor and the bit pointing back
+        self._link_steps = [(dr * self.cols + dc, DIRECTION_BITS[(-dr, -dc)], dr, dc) for dr, dc in DIRECTIONS]
+
+        # Flat-index offsets for every possible link mask, so listing the neighbors of a
+        # cell is a table lookup instead of four (or eight) bounds and barrier checks.
+        deltas = [dr * self.cols + dc for dr, dc in DIRECTIONS]
+        self._offsets = [tuple(deltas[bit] for bit in range(8) if mask & (1 << bit)) for mask in range(256)]
+
+        # Edit log for planners that keep state between queries: every change of a cell's
+        # barrier status appends its index and bumps the version (see changes_since)
+        self.version = 0
+        self.edits = []
+
+        # Hash of the barrier set: XOR of cell_hash over all barrier cells. Updated on every
+        # barrier change, so equal barrier layouts give equal fingerprints (see path_cache.py)
+        self.fingerprint = 0
+
+        self.update_neighbors()
+
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def pos(self, index):
+        return divmod(index, self.cols)
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def get_state(self, index):
+        return self.cells[index]
+
+    def set_state(self, index, state):
+        was_barrier = self.cells[index] == BARRIER
+        self.cells[index] = state
+        if was_barrier != (state == BARRIER):
+            self._relink(index, state != BARRIER)
+            self.fingerprint ^= cell_hash(index)
+            self.edits.append(index)
+            self.version += 1
+
+    def changes_since(self, version):
+        """
+        Indices of cells whose barrier status changed after `version` (may repeat), or None
+        if the whole grid was rebuilt since then and everything has to be treated as changed.
+        """
+        changes = self.edits[version:]
+        if None in changes:
+            return None
+        return changes
+
+    def is_barrier(self, index):
+        return self.cells[index] == BARRIER
+
+    def set_barrier(self, row, col):
+        self.set_state(row * self.cols + col, BARRIER)
+
+    def reset(self, row, col):
+        self.set_state(row * self.cols + col, EMPTY)
+
+    def _relink(self, index, passable):
+        # A cell became a barrier or was cleared: only the links pointing at it from its
+        # (up to 8) neighbors change
+        row, col = divmod(index, self.cols)
+        links = self.links
+        for offset, back_bit, dr, dc in self._link_steps:
+            if 0 <= row + dr < self.rows and 0 <= col + dc < self.cols:
+                if passable:
+                    links[index + offset] |= back_bit
+                else:
+                    links[index + offset] &= ~back_bit
+
+    def clear_search_marks(self):
+        """Reset cells left OPEN, CLOSED or PATH by a previous search."""
+        marks = self.state
+        marks[(marks == OPEN) | (marks == CLOSED) | (marks == PATH)] = EMPTY
+
+    def update_neighbors(self):
+        """
+        Rebuild the link mask of every cell from the current barriers.
+        Only needed after writing barriers straight into the `state` array (e.g. a bulk
+        load); set_state() keeps the links up to date on its own.
+        """
+        free = np.zeros((self.rows + 2, self.cols + 2), dtype=bool)
+        free[1:-1, 1:-1] = self.state != BARRIER
+
+        links = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        for bit, (dr, dc) in enumerate(DIRECTIONS):
+            shifted = free[1 + dr:1 + dr + self.rows, 1 + dc:1 + dc + self.cols]
+            links |= shifted.astype(np.uint8) << bit
+        self.link_state[...] = links
+        self.fingerprint = int(np.bitwise_xor.reduce(cell_hashes(np.flatnonzero(self.state == BARRIER)), initial=np.uint64(0)))
+
+        # The barriers may have been rewritten wholesale; log that as a full change
+        self.edits.append(None)
+        self.version += 1
+
+    def neighbors(self, index):
+        """Passable 4-connected neighbors of a cell, as flat indices."""
+        return [index + offset for offset in self._offsets[self.links[index] & STRAIGHT_MASK]]
+
+    def neighbors8(self, index):
+        """Passable 8-connected neighbors of a cell, as flat indices."""
+        return [index + offset for offset in self._offsets[self.links[index]]]
@@ -0,0 +1,85 @@
+import heapq
+
+
+class OpenList:
+    """
+    Open set shared by the grid searches: a binary heap (heapq) with lazy deletion.
+    There is no lock (unlike queue.PriorityQueue) and no separate membership set.
+    Pushing a node that is already queued with a worse priority acts as decrease-key:
+    the new entry is added and the old one is skipped when it reaches the top.
+    Nodes are flat cell indices; equal priorities pop in insertion order.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.priority = {}  # node -> priority of its live heap entry
+        self.count = 0  # Tie-breaker for equal priorities
+        self.pushes = 0
+        self.pops = 0
+
+    def __len__(self):
+        return len(self.priority)
+
+    def __contains__(self, node):
+        return node in self.priority
+
+    def push(self, node, priority):
+        """Add a node, or lower its priority if it is already queued. Returns False if nothing changed."""
+        queued = self.priority.get(node)
+        if queued is not None and queued <= priority:
+            return False
+        self.priority[node] = priority
+        self.count += 1
+        self.pushes += 1
+        heapq.heappush(self.heap, (priority, self.count, node))
+        return True
+
+    def pop(self):
+        """Remove and return the node with the lowest priority."""
+        heap = self.heap
+        live = self.priority
+        while heap:
+            priority, _, node = heapq.heappop(heap)
+            self.pops += 1
+            # Entries replaced by a later decrease-key (or for nodes already popped) are stale
+            if live.get(node) == priority:
+                del live[node]
+                return node
+        raise IndexError("pop from an empty open list")
+
+    def remove(self, node):
+        """Drop a node from the list if it is queued (its heap entry becomes stale)."""
+        self.priority.pop(node, None)
+
+    def peek_priority(self):
+        """Lowest priority in the list without removing it, or None when the list is empty."""
+        heap = self.heap
+        live = self.priority
+        while heap and live.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+            self.pops += 1
+        return heap[0][0] if heap else None
+
+
+class TrackedOpenList(OpenList):
+    """
+    OpenList that also records its peak heap size and the pops that returned a node, for
+    SearchStats. Searches only use it when asked to record stats.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.peak = 0
+        self.live_pops = 0
+
+    def push(self, node, priority):
+        if not super().push(node, priority):
+            return False
+        if len(self.heap) > self.peak:
+            self.peak = len(self.heap)
+        return True
+
+    def pop(self):
+        node = super().pop()
+        self.live_pops += 1
+        return node
@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict
+from algorithm import path_cells, plan
+from search_result import SearchResult
+
+
+class PathCache:
+    """
+    LRU cache of complete plan() results, keyed by the grid's barrier fingerprint, the
+    algorithm name and the endpoints (start, waypoints, end).
+    Editing a barrier changes the fingerprint, so stale results are simply never looked
+    up again and age out of the cache; putting the barriers back the way they were makes
+    the old results hit again.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, grid, algorithm, start, end, waypoints=None):
+        return (grid.rows, grid.cols, grid.fingerprint, algorithm,
+                tuple(start), tuple(end), tuple(tuple(w) for w in waypoints or ()))
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def plan(self, grid, start, end, waypoints=None, algorithm="A*", observer=None):
+        """
+        Same as algorithm.plan, but answers repeated queries on an unchanged map from the
+        cache. A hit returns a SearchResult with 0 expansions and only draws the path.
+        """
+        started = time.perf_counter()
+        key = self.key(grid, algorithm, start, end, waypoints)
+        result = self.get(key)
+        if result is None:
+            result = plan(grid, start, end, waypoints, algorithm, observer)
+            self.put(key, result)
+            return result
+
+        if observer:
+            observer.on_path([grid.index(*cell) for cell in path_cells(result.path)])
+        return SearchResult(result.path, result.cost, 0, time.perf_counter() - started)
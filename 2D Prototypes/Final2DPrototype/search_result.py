@@ -0,0 +1,78 @@
+import time
+
+
+class SearchResult:
+    """
+    Outcome of a search. Truthy when a path was found.
+    Attributes:
+        path: List of (row, col) cells from start to end, or None if there is no path.
+        cost: Length of the path (inf if there is no path).
+        expansions: Number of nodes taken off the open set and expanded.
+        elapsed: Wall-clock search time in seconds.
+        stats: The SearchStats the search recorded into, or None if it wasn't given one.
+    """
+
+    def __init__(self, path, cost, expansions, elapsed, stats=None):
+        self.path = path
+        self.cost = cost
+        self.expansions = expansions
+        self.elapsed = elapsed
+        self.stats = stats
+
+    def __bool__(self):
+        return self.path is not None
+
+    def __repr__(self):
+        return f"SearchResult(cost={self.cost}, expansions={self.expansions}, elapsed={self.elapsed:.4f}s)"
+
+
+class SearchStats:
+    """
+    Counters a planner records when it is passed one (stats=SearchStats()). Planners
+    that aren't given one skip all of this bookkeeping, so it costs next to nothing when
+    off. Passing the same SearchStats to several searches (e.g. the legs of a route)
+    adds them up.
+    Attributes:
+        expansions: Nodes taken off the open list and expanded.
+        pushes: Entries pushed onto the open list's heap.
+        stale_pops: Heap entries popped and skipped because the node was queued again with
+            a better priority (or dropped) after they were pushed.
+        peak_open: Largest heap size seen (stale entries included).
+        neighbor_time: Seconds spent generating neighbors (or jump points).
+        collision_time: Seconds spent on collision checks. On the grid, barriers are already
+            left out of the neighbor link masks, so this is line-of-sight checks (Theta*).
+    """
+
+    __slots__ = ("expansions", "pushes", "stale_pops", "peak_open", "neighbor_time", "collision_time")
+
+    def __init__(self):
+        self.expansions = 0
+        self.pushes = 0
+        self.stale_pops = 0
+        self.peak_open = 0
+        self.neighbor_time = 0.0
+        self.collision_time = 0.0
+
+    def timed(self, function, field):
+        """Wrap a function so the time of every call is added to the named field."""
+        perf_counter = time.perf_counter
+
+        def timed_function(*args):
+            began = perf_counter()
+            try:
+                return function(*args)
+            finally:
+                setattr(self, field, getattr(self, field) + perf_counter() - began)
+        return timed_function
+
+    def add_open_list(self, open_set):
+        """Add the counters of a TrackedOpenList."""
+        self.pushes += open_set.pushes
+        self.stale_pops += open_set.pops - open_set.live_pops
+        self.peak_open = max(self.peak_open, open_set.peak)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return "SearchStats(" + ", ".join(f"{name}={value:.4g}" for name, value in self.as_dict().items()) + ")"
@@ -1,4 +1,5 @@
 import pygame
+from occupancy_grid import EMPTY, BARRIER, START, END, WAYPOINT, OPEN, CLOSED, PATH
 
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
@@ -12,79 +13,94 @@ GREY = (128, 128, 128)
 DARKGREY = (50, 50, 50)
 TURQUOISE = (64, 224, 208)
 
+# Color used to draw each OccupancyGrid cell state
+STATE_COLORS = {
+    EMPTY: WHITE,
+    BARRIER: BLACK,
+    START: ORANGE,
+    END: TURQUOISE,
+    WAYPOINT: BLUE,
+    OPEN: GREEN,
+    CLOSED: RED,
+    PATH: PURPLE,
+}
+
 class Spot:
-    def __init__(self, row, col, width, total_rows):
+    """
+    Thin view of one cell of an OccupancyGrid, used by the pygame UI.
+    Spots hold no state of their own, so they can be created on demand and thrown away.
+    """
+    def __init__(self, grid, row, col, width, total_rows):
+        self.grid = grid
         self.row = row
         self.col = col
+        self.index = grid.index(row, col)
         self.x = row * width
         self.y = col * width
-        self.color = WHITE
-        self.neighbors = []
         self.width = width
         self.total_rows = total_rows
 
+    def __eq__(self, other):
+        return isinstance(other, Spot) and other.grid is self.grid and other.index == self.index
+
+    def __hash__(self):
+        return hash(self.index)
+
+    @property
+    def color(self):
+        return STATE_COLORS[self.grid.get_state(self.index)]
+
+    @property
+    def neighbors(self):
+        return [Spot(self.grid, *self.grid.pos(i), self.width, self.total_rows) for i in self.grid.neighbors(self.index)]
+
     def get_pos(self):
         return self.row, self.col
 
     def is_closed(self):
-        return self.color == RED
+        return self.grid.get_state(self.index) == CLOSED
 
     def is_open(self):
-        return self.color == GREEN
+        return self.grid.get_state(self.index) == OPEN
 
     def is_barrier(self):
-        return self.color == BLACK
+        return self.grid.get_state(self.index) == BARRIER
 
     def is_start(self):
-        return self.color == ORANGE
+        return self.grid.get_state(self.index) == START
 
     def is_end(self):
-        return self.color == TURQUOISE
+        return self.grid.get_state(self.index) == END
 
     def is_waypoint(self):
-        return self.color == BLUE
+        return self.grid.get_state(self.index) == WAYPOINT
 
     def is_path(self):
-        return self.color == PURPLE
+        return self.grid.get_state(self.index) == PATH
 
     def reset(self):
-        self.color = WHITE
+        self.grid.set_state(self.index, EMPTY)
 
     def make_start(self):
-        self.color = ORANGE
+        self.grid.set_state(self.index, START)
 
     def make_closed(self):
-        self.color = RED
+        self.grid.set_state(self.index, CLOSED)
 
     def make_open(self):
-        self.color = GREEN
+        self.grid.set_state(self.index, OPEN)
 
     def make_barrier(self):
-        self.color = BLACK
+        self.grid.set_state(self.index, BARRIER)
 
     def make_end(self):
-        self.color = TURQUOISE
+        self.grid.set_state(self.index, END)
 
     def make_waypoint(self):
-        self.color = BLUE
+        self.grid.set_state(self.index, WAYPOINT)
 
     def make_path(self):
-        self.color = PURPLE
+        self.grid.set_state(self.index, PATH)
 
     def draw(self, win):
         pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.width))
-
-    def update_neighbors(self, grid):
-        self.neighbors = []
-        if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row + 1][self.col])
-
-        if self.row > 0 and not grid[self.row - 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row - 1][self.col])
-
-        if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col + 1])
-
-        if self.col > 0 and not grid[self.row][self.col - 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col - 1])
-
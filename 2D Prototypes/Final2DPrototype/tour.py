@@ -0,0 +1,135 @@
+import time
+from algorithm import dijkstraMultiGoal, leg_cache, path_cells
+from search_result import SearchResult
+
+INF = float("inf")
+
+# Tour legs are stored in the grid's LegCache under this planner name
+LEG_ALGORITHM = "Dijkstra"
+
+
+def leg_matrix(grid, points, stats=None):
+    """
+    Cost matrix between all (row, col) points plus the paths of every leg.
+    Each point runs one dijkstraMultiGoal sweep to the points after it that aren't in the
+    grid's LegCache yet; moves cost the same in both directions, so the reverse legs are
+    the same paths backwards.
+    Returns (costs, legs, expansions) with legs[(a, b)] = SearchResult from a to b.
+    A SearchStats given as stats records the sweeps.
+    """
+    cache = leg_cache(grid)
+    legs = {}
+    expansions = 0
+    for i, source in enumerate(points):
+        targets = []
+        for target in points[i + 1:]:
+            result = cache.get(LEG_ALGORITHM, source, target)
+            if result is None:
+                targets.append(target)
+            else:
+                legs[(source, target)] = result
+        if targets:
+            results = dijkstraMultiGoal(grid, source, targets, stats=stats)
+            expansions += results[targets[0]].expansions
+            for target, result in results.items():
+                legs[(source, target)] = result
+                cache.put(LEG_ALGORITHM, source, target, result, path_cells(result.path))
+
+        for target in points[i + 1:]:
+            result = legs[(source, target)]
+            legs[(target, source)] = SearchResult(result.path[::-1] if result.path else None, result.cost,
+                                                  result.expansions, result.elapsed)
+
+    costs = [[0 if a == b else legs[(a, b)].cost for b in points] for a in points]
+    return costs, legs, expansions
+
+
+def route_cost(costs, route):
+    return sum(costs[a][b] for a, b in zip(route, route[1:]))
+
+
+def solve_order(costs):
+    """
+    Visiting order for an open tour from point 0 to the last point through all the points
+    in between: nearest-neighbor construction improved with 2-opt and Or-opt moves until
+    neither finds a shorter route. `costs` must be symmetric.
+    Returns the route as a list of point indices, starting with 0 and ending with the last.
+    """
+    n = len(costs)
+    last = n - 1
+
+    # Nearest neighbor from the start
+    route = [0]
+    unvisited = set(range(1, last))
+    while unvisited:
+        nearest = min(unvisited, key=lambda p: costs[route[-1]][p])
+        route.append(nearest)
+        unvisited.remove(nearest)
+    if last > 0:
+        route.append(last)
+
+    improved = True
+    while improved:
+        improved = False
+
+        # 2-opt: reverse route[i..j] if reconnecting its ends is shorter
+        for i in range(1, len(route) - 2):
+            for j in range(i + 1, len(route) - 1):
+                a, b, c, d = route[i - 1], route[i], route[j], route[j + 1]
+                if costs[a][c] + costs[b][d] < costs[a][b] + costs[c][d] - 1e-9:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    improved = True
+
+        # Or-opt: move a run of 1-3 points (possibly reversed) to another gap of the route
+        for length in (1, 2, 3):
+            i = 1
+            while i + length < len(route):
+                segment = route[i:i + length]
+                a, b = route[i - 1], route[i + length]
+                removed = costs[a][segment[0]] + costs[segment[-1]][b] - costs[a][b]
+                rest = route[:i] + route[i + length:]
+                best = None
+                for k in range(len(rest) - 1):
+                    c, d = rest[k], rest[k + 1]
+                    for candidate in (segment, segment[::-1]):
+                        added = costs[c][candidate[0]] + costs[candidate[-1]][d] - costs[c][d]
+                        if added < removed - 1e-9 and (best is None or added < best[0]):
+                            best = (added, k, candidate)
+                if best is not None:
+                    _, k, candidate = best
+                    route = rest[:k + 1] + candidate + rest[k + 1:]
+                    improved = True
+                i += 1
+
+    return route
+
+
+def plan_tour(grid, start, end, waypoints, observer=None, stats=None):
+    """
+    Visit all waypoints in the order that minimizes the total path length.
+    Args:
+        grid: The OccupancyGrid to search.
+        start: (row, col) of the start cell.
+        end: (row, col) of the goal cell.
+        waypoints: List of (row, col) waypoint cells, in any order.
+        observer: (Optional) SearchObserver; only shown the final stitched path.
+        stats: (Optional) SearchStats to record the leg sweeps into.
+    Returns:
+        A SearchResult with the stitched path (None if some waypoint can't be reached).
+    """
+    started = time.perf_counter()
+    points = [tuple(start)] + [tuple(w) for w in waypoints] + [tuple(end)]
+    costs, legs, expansions = leg_matrix(grid, points, stats)
+
+    path = None
+    total = INF
+    if all(cost < INF for cost in costs[0]):
+        route = solve_order(costs)
+        total = route_cost(costs, route)
+        path = [points[0]]
+        for a, b in zip(route, route[1:]):
+            path.extend(legs[(points[a], points[b])].path[1:] if points[a] != points[b] else [])
+
+    if observer:
+        observer.on_path([grid.index(*cell) for cell in path or []])
+    return SearchResult(path, total, expansions, time.perf_counter() - started, stats)
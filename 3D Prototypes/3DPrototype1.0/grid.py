@@ -1,5 +1,6 @@
 # grid_system.py
 
+import math
 import numpy as np
 
 class Grid:
@@ -8,11 +9,59 @@ class Grid:
         self.step = step
         self.grid = np.zeros((int(size[0]/step), int(size[1]/step), int(size[2]/step)))
         self.barriers = []  # Store barriers as floating-point coordinates
-    
+        # Inflated obstacle masks, one per object size: True at every lattice point where an
+        # object of that size would touch a barrier. Built on first use, kept up to date after.
+        self.collision_masks = {}
+        # Search lattices built from those masks by pathfinding.py, keyed by (object size, step)
+        self.lattices = {}
+
     def add_barrier(self, x, y, z):
         self.barriers.append((x, y, z))
-    
+        for object_size, mask in self.collision_masks.items():
+            self._inflate(mask, (x, y, z), object_size)
+        self.lattices.clear()  # Their blocked arrays are copies of the masks
+
+    def collision_mask(self, object_size=(0.5, 0.5, 0.5)):
+        """
+        Boolean array over the lattice (same shape as self.grid, point (i, j, k) is at
+        (i * step, j * step, k * step)) marking positions that collide for this object size.
+        """
+        object_size = tuple(object_size)
+        mask = self.collision_masks.get(object_size)
+        if mask is None:
+            mask = np.zeros(self.grid.shape, dtype=bool)
+            for barrier in self.barriers:
+                self._inflate(mask, barrier, object_size)
+            self.collision_masks[object_size] = mask
+        return mask
+
+    def _inflate(self, mask, barrier, object_size):
+        # Mark the block of lattice points inside the barrier's box grown by the object's
+        # half size (the same test as is_within_boundary, with a little float tolerance)
+        slices = []
+        for axis in range(3):
+            reach = object_size[axis] / 2.0 + 0.5
+            low = max(math.ceil((barrier[axis] - reach) / self.step - 1e-9), 0)
+            high = min(math.floor((barrier[axis] + reach) / self.step + 1e-9), mask.shape[axis] - 1)
+            if low > high:
+                return
+            slices.append(slice(low, high + 1))
+        mask[tuple(slices)] = True
+
     def is_collision(self, position, object_size=(0.5, 0.5, 0.5)):
+        # Lattice points inside the grid are a single lookup in the inflated mask
+        mask = self.collision_mask(object_size)
+        index = []
+        for axis in range(3):
+            i = position[axis] / self.step
+            nearest = round(i)
+            if abs(i - nearest) > 1e-6 or not 0 <= nearest < mask.shape[axis]:
+                break
+            index.append(nearest)
+        else:
+            return bool(mask[tuple(index)])
+
+        # Off-lattice or out-of-grid positions fall back to checking every barrier
         object_radius_x = object_size[0] / 2.0
         object_radius_y = object_size[1] / 2.0
         object_radius_z = object_size[2] / 2.0
@@ -20,7 +69,7 @@ class Grid:
             if self.is_within_boundary(position, barrier, object_radius_x, object_radius_y, object_radius_z):
                 return True
         return False
-    
+
     def is_within_boundary(self, position, barrier, radius_x, radius_y, radius_z):
         px, py, pz = position
         bx, by, bz = barrier
@@ -55,7 +55,10 @@ def main():
     # Object size is 0.5 x 0.5 x 0.5
     object_size = (0.5, 0.5, 0.5)
 
-    # First path: from start to waypoint
+    # First path: from start to waypoint. Both barriers sit on the straight line, so this leg
+    # is the expensive one: the detour has to be found among (cell, move) states, about 155k
+    # expanded and 1.8M queued (about 20 s here, with a heap of up to 1.7M entries).
+    # The second leg takes well under a second.
     path_to_waypoint = a_star_3d(grid, start, waypoint, step=0.1, object_size=object_size)
     
     # Second path: from waypoint to end
@@ -1,90 +1,261 @@
 # pathfinding.py
 
 import heapq
+import time
 import numpy as np
 import math
 
-def a_star_3d(grid, start, end, step=0.1, object_size=(0.5, 0.5, 0.5)):
+def a_star_3d(grid, start, end, step=0.1, object_size=(0.5, 0.5, 0.5), stats=None):
+    # The search runs on packed integer lattice keys; metric coordinates are only
+    # converted at the start/end and when the path is returned.
+    # A SearchStats (search_stats.py) passed as stats records the search's counters (nodes
+    # are (cell, move) states) and times generating the neighbor keys and the blocked[]
+    # lookups. Building the Lattice is setup and isn't counted.
+    lattice = Lattice.of(grid, step, object_size)
+    start_key = lattice.key(start)
+    end_key = lattice.key(end)
+    if start_key is None or end_key is None:
+        return None  # Start or end is outside the grid
+
+    # Search states are (cell, incoming move) packed as key * STATES_PER_CELL + move, so the
+    # turn penalty of the next move is exact instead of depending on whichever parent the
+    # cell happened to record first. The start has no incoming move (NO_MOVE).
+    # Up to 27 states per cell would make this a much bigger search than one over cells,
+    # so two things keep it close to that size (both keep the paths optimal):
+    # - the heuristic includes the turning still needed (see remaining_turn), since at
+    #   small steps turn penalties are far larger than move lengths;
+    # - a state is dropped when an expanded state of the same cell is at least as cheap
+    #   after paying the turn between their incoming moves (it can then continue any way
+    #   the dropped one could, for no more).
+    start_state = start_key * STATES_PER_CELL + NO_MOVE
     frontier = []
-    heapq.heappush(frontier, (0, start))
-    cost_so_far = {start: 0}
-    came_from = {start: None}
+    heapq.heappush(frontier, (0, 0, start_state))
+    cost_so_far = {start_state: 0}
+    came_from = {start_state: None}
+    closed = set()
+    expanded_by_cell = {}  # Cell -> [(incoming move, cost)] of its expanded states
+    end_coords = lattice.coords(end_key)
+    delta_by_cell = {}  # Cell -> (offset to the end in lattice steps, its length)
 
+    blocked = lattice.blocked
+    moves = lattice.moves
+    turn_costs = lattice.turn_costs
+    perf_counter = time.perf_counter
+    turn_penalties = lattice.turn_penalties
+    end_state = None
+    pops = stale_pops = peak = 0
     while frontier:
-        current_priority, current_node = heapq.heappop(frontier)
+        if stats is not None:
+            pops += 1
+            peak = max(peak, len(frontier))
+        current_priority, _, current_state = heapq.heappop(frontier)
+        if current_state in closed:
+            stale_pops += 1
+            continue  # Stale entry, the state was already expanded at a lower cost
+        closed.add(current_state)
 
-        if current_node == end:
+        current_node, incoming = divmod(current_state, STATES_PER_CELL)
+        if current_node == end_key:
+            end_state = current_state
             break
 
-        for neighbor in get_neighbors_3d(current_node, grid, step):
-            # Convert the floating-point coordinates to grid indices
-            ix, iy, iz = int(neighbor[0] / step), int(neighbor[1] / step), int(neighbor[2] / step)
-
-            # Ensure the indices are valid for the grid size
-            if ix < 0 or iy < 0 or iz < 0 or ix >= int(grid.size[0]/step) or iy >= int(grid.size[1]/step) or iz >= int(grid.size[2]/step):
-                continue
-
-            # Check for collision with barriers using object dimensions
-            if grid.is_collision(neighbor, object_size):
-                continue
-
-            new_cost = cost_so_far[current_node] + calculate_movement_cost(current_node, neighbor, came_from)
-
-            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                cost_so_far[neighbor] = new_cost
-                priority = new_cost + heuristic(neighbor, end)
-                heapq.heappush(frontier, (priority, neighbor))
-                came_from[neighbor] = current_node
-
-    return reconstruct_path(came_from, start, end)
-
-# Get neighboring cells, now moves are step-sized (0.1)
-def get_neighbors_3d(node, grid, step):
-    x, y, z = node
-    neighbors = []
-    for dx in [-step, 0, step]:
-        for dy in [-step, 0, step]:
-            for dz in [-step, 0, step]:
-                if dx == 0 and dy == 0 and dz == 0:
-                    continue
-                neighbor = (round(x + dx, 1), round(y + dy, 1), round(z + dz, 1))
-                ix = int(neighbor[0] / step)
-                iy = int(neighbor[1] / step)
-                iz = int(neighbor[2] / step)
-                if 0 <= ix < int(grid.size[0]/step) and 0 <= iy < int(grid.size[1]/step) and 0 <= iz < int(grid.size[2]/step):
-                    neighbors.append(neighbor)
-    return neighbors
-
-# Movement cost with degree-based calculation
-def calculate_movement_cost(current_node, next_node, came_from):
-    distance = np.linalg.norm(np.array(current_node) - np.array(next_node))
-    if came_from[current_node] is None:
+        current_cost = cost_so_far[current_state]
+        expanded = expanded_by_cell.get(current_node)
+        if expanded is None:
+            expanded_by_cell[current_node] = [(incoming, current_cost)]
+        elif any(cost + turn_penalties[move][incoming] <= current_cost for move, cost in expanded):
+            stale_pops += 1
+            continue  # Dominated by a state of this cell that was already expanded
+        else:
+            expanded.append((incoming, current_cost))
+
+        # Neighbor cells that aren't blocked; out-of-grid cells are blocked too (the lattice
+        # has a blocked border). Split in two passes only to time them separately.
+        if stats is None:
+            free = [(current_node + offset, move) for offset, move in moves if not blocked[current_node + offset]]
+        else:
+            began = perf_counter()
+            neighbors = [(current_node + offset, move) for offset, move in moves]
+            generated = perf_counter()
+            free = [(neighbor, move) for neighbor, move in neighbors if not blocked[neighbor]]
+            stats.neighbor_time += generated - began
+            stats.collision_time += perf_counter() - generated
+
+        # Cost of every move after the incoming move, from the precomputed turn table
+        move_costs = turn_costs[incoming]
+        for neighbor, move in free:
+            neighbor_state = neighbor * STATES_PER_CELL + move
+            new_cost = current_cost + move_costs[move]
+
+            if new_cost < cost_so_far.get(neighbor_state, math.inf):
+                expanded = expanded_by_cell.get(neighbor)
+                if expanded and any(cost + turn_penalties[m][move] <= new_cost for m, cost in expanded):
+                    continue  # Dominated already, don't queue it
+                cost_so_far[neighbor_state] = new_cost
+                delta = delta_by_cell.get(neighbor)
+                if delta is None:
+                    coords = lattice.coords(neighbor)
+                    offset = (end_coords[0] - coords[0], end_coords[1] - coords[1], end_coords[2] - coords[2])
+                    delta = delta_by_cell[neighbor] = (offset, math.hypot(*offset))
+                remaining = delta[1] * step + remaining_turn(move, *delta)
+                # Exact cost ties are common on the integer lattice: prefer the state closer to the end
+                heapq.heappush(frontier, (new_cost + remaining, remaining, neighbor_state))
+                came_from[neighbor_state] = current_state
+
+    if stats is not None:
+        # Every state but the end's was expanded once
+        stats.add_search(len(closed) - (end_state is not None), pops + len(frontier), stale_pops, peak)
+    if end_state is None:
+        return None  # No path found
+    path = reconstruct_path(came_from, start_state, end_state)
+    return [lattice.point(state // STATES_PER_CELL) for state in path]
+
+class Lattice:
+    """
+    Integer view of the grid for the search. Lattice point (i, j, k) sits at
+    (i * step, j * step, k * step) and is stored as one packed int key into a flat
+    blocked array that has a one-cell blocked border, so a neighbor is just
+    `key + offset` with no bounds checks. `step` has to match the grid's step.
+    Use Lattice.of to share one per grid, object size and step between queries.
+    """
+
+    @classmethod
+    def of(cls, grid, step, object_size):
+        """The grid's cached lattice for this step and object size (built on first use)."""
+        key = (tuple(object_size), step)
+        lattice = grid.lattices.get(key)
+        if lattice is None:
+            lattice = grid.lattices[key] = cls(grid, step, object_size)
+        return lattice
+
+    def __init__(self, grid, step, object_size):
+        if not math.isclose(step, grid.step):
+            raise ValueError("step must match the grid step.")
+        self.step = step
+        self.shape = grid.grid.shape
+        nx, ny, nz = self.shape
+
+        # Inflated obstacles of this object size, plus the blocked border
+        padded = np.ones((nx + 2, ny + 2, nz + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1, 1:-1] = grid.collision_mask(object_size)
+        self.blocked = bytearray(padded.tobytes())
+        self.strides = ((ny + 2) * (nz + 2), nz + 2, 1)
+
+        # The 26 moves as (key offset, index into MOVES)
+        sx, sy, sz = self.strides
+        self.moves = [(dx * sx + dy * sy + dz * sz, move) for move, (dx, dy, dz) in enumerate(MOVES)]
+        self.turn_costs = turn_cost_table(step)
+        self.turn_penalties = TURN_PENALTIES
+
+    def key(self, point):
+        """Packed key of the lattice point nearest to a metric point, or None outside the grid."""
+        coords = [round(p / self.step) for p in point]
+        if not all(0 <= c < n for c, n in zip(coords, self.shape)):
+            return None
+        sx, sy, sz = self.strides
+        return (coords[0] + 1) * sx + (coords[1] + 1) * sy + (coords[2] + 1) * sz
+
+    def coords(self, key):
+        """Lattice indices (i, j, k) of a packed key."""
+        sx, sy, _ = self.strides
+        i, rest = divmod(key, sx)
+        j, k = divmod(rest, sy)
+        return i - 1, j - 1, k - 1
+
+    def point(self, key):
+        """Metric coordinates of a packed key."""
+        return tuple(round(c * self.step, 6) for c in self.coords(key))
+
+# The 26 lattice moves (dx, dy, dz); moves are referred to by their index in this list
+MOVES = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if (dx, dy, dz) != (0, 0, 0)]
+NO_MOVE = len(MOVES)  # Turn table row for the first move of a path (no turn penalty)
+STATES_PER_CELL = len(MOVES) + 1  # One search state per incoming move, plus NO_MOVE
+ANGLE_PENALTY_WEIGHT = 0.1  # Tweakable weight
+
+# Movement cost with degree-based calculation. Moves are lattice direction vectors.
+def calculate_movement_cost(previous_move, move, step):
+    distance = math.hypot(*move) * step
+    if previous_move is None:
         return distance
-    previous_node = came_from[current_node]
-    angle_change = calculate_angular_change(previous_node, current_node, next_node)
-    angle_penalty_weight = 0.1  # Tweakable weight
-    return distance + (angle_penalty_weight * angle_change)
-
-def calculate_angular_change(prev, current, next):
-    vec1 = np.array(current) - np.array(prev)
-    vec2 = np.array(next) - np.array(current)
-    norm_vec1 = vec1 / np.linalg.norm(vec1)
-    norm_vec2 = vec2 / np.linalg.norm(vec2)
-    dot_product = np.dot(norm_vec1, norm_vec2)
-    dot_product = np.clip(dot_product, -1.0, 1.0)
-    angle_radians = np.arccos(dot_product)
-    angle_degrees = np.degrees(angle_radians)
-    return angle_degrees
+    angle_change = calculate_angular_change(previous_move, move)
+    return distance + (ANGLE_PENALTY_WEIGHT * angle_change)
+
+def calculate_angular_change(vec1, vec2):
+    # Plain float math: for 3-element vectors NumPy's per-call overhead costs more than the math
+    dot_product = (vec1[0] * vec2[0] + vec1[1] * vec2[1] + vec1[2] * vec2[2]) / (math.hypot(*vec1) * math.hypot(*vec2))
+    dot_product = min(max(dot_product, -1.0), 1.0)
+    return math.degrees(math.acos(dot_product))
+
+def movement_costs(previous_moves, moves, step):
+    """
+    Batched calculate_movement_cost: scores N edges in one NumPy call.
+    Args:
+        previous_moves: (N, 3) array of the moves leading into each edge; all-zero rows
+            mean there was no previous move (no turn penalty).
+        moves: (N, 3) array of the edge moves.
+        step: Grid step (edge length of a straight move).
+    Returns:
+        An (N,) array of edge costs.
+    """
+    previous_moves = np.asarray(previous_moves, dtype=float).reshape(-1, 3)
+    moves = np.asarray(moves, dtype=float).reshape(-1, 3)
+    previous_lengths = np.linalg.norm(previous_moves, axis=1)
+    lengths = np.linalg.norm(moves, axis=1)
+
+    has_previous = previous_lengths > 0
+    dot_products = np.einsum("ij,ij->i", previous_moves, moves) / np.where(has_previous, previous_lengths * lengths, 1.0)
+    angles = np.degrees(np.arccos(np.clip(dot_products, -1.0, 1.0)))
+    return lengths * step + np.where(has_previous, ANGLE_PENALTY_WEIGHT * angles, 0.0)
+
+def turn_cost_table(step):
+    """
+    Cost of every (previous move, move) pair: table[previous][move], with MOVES indices
+    and an extra last row (NO_MOVE) for the first move. The search only does lookups.
+    """
+    moves = np.array(MOVES)
+    previous = np.vstack([moves, np.zeros((1, 3))])
+    costs = movement_costs(np.repeat(previous, len(MOVES), axis=0), np.tile(moves, (len(previous), 1)), step)
+    return costs.reshape(len(previous), len(MOVES)).tolist()
+
+def turn_penalty_table():
+    """
+    Turn penalty between every pair of moves: table[previous][move], with MOVES indices
+    and an all-zero last row (NO_MOVE). A state entered by `previous` can make any move
+    for at most this much more than one entered by `move` (by the triangle inequality).
+    """
+    table = [[ANGLE_PENALTY_WEIGHT * calculate_angular_change(a, b) for b in MOVES] for a in MOVES]
+    return table + [[0.0] * len(MOVES)]
+
+TURN_PENALTIES = turn_penalty_table()
+MOVE_LENGTHS = [math.hypot(*move) for move in MOVES]
+
+def remaining_turn(incoming, offset, length):
+    """
+    Lower bound on the turn penalties still to pay from a cell entered by `incoming` to
+    a goal `offset` (lattice steps, `length` long) away: the path has to turn at least
+    by the angle between the incoming move and the offset, and at least 90 degrees when
+    that angle is wider. Moving along a move only widens its angle to the goal, so the
+    bound stays consistent.
+    """
+    if length == 0:
+        return 0.0
+    mx, my, mz = MOVES[incoming]
+    cosine = (mx * offset[0] + my * offset[1] + mz * offset[2]) / (MOVE_LENGTHS[incoming] * length)
+    if cosine <= 0:
+        return ANGLE_PENALTY_WEIGHT * 90
+    return ANGLE_PENALTY_WEIGHT * math.degrees(math.acos(min(cosine, 1.0)))
 
 def heuristic(point1, point2):
-    return np.linalg.norm(np.array(point1) - np.array(point2))
+    return math.dist(point1, point2)
 
 def reconstruct_path(came_from, start, end):
     path = []
     current = end
     while current != start:
         path.append(current)
-        current = came_from[current]
+        current = came_from.get(current)
+        if current is None:
+            return None  # No path found
     path.append(start)
     path.reverse()
     return path
@@ -0,0 +1,166 @@
+"""
+Headless batch planning: load a voxel map, run a file of queries with any of the
+planners and write one JSON line of results per query.
+
+Run with: python batch.py MAP QUERIES [-p PLANNER] [-o OUTPUT] [--no-paths] [--stats] [--sparse] [-j PROCESSES]
+
+MAP is either a .npy file holding a cubic boolean array (True = barrier) or a text
+file whose first line is the grid size, followed by one "x y z" barrier per line
+('#' starts a comment). --sparse loads it into a sparse Grid (for the octree planner
+on maps too big for a dense array; text maps only).
+
+QUERIES has one JSON object per line, e.g.
+    {"start": [0, 0, 0], "end": [7, 7, 7], "waypoints": [[3, 1, 4]], "planner": "Octree A*"}
+"waypoints", "planner" (default: the -p option) and "tour": true (visit the waypoints
+in the shortest order, see tour.py) are optional. The "Clearance A*" planner also reads
+"radius" and "clearance_weight" (see find_clearance_path).
+
+Each output line holds the query number, the planner, whether a path was found, its
+length (sum of the step lengths), the number of points, expansions, the time in seconds
+and the path as [x, y, z] points, or an "error" for queries that could not be run.
+--stats adds the search's SearchStats counters and timings as "stats".
+"""
+import argparse
+import json
+import math
+import sys
+import time
+import numpy as np
+from grid import Grid
+from pathfinding import a_star_3d
+from search_stats import SearchStats
+from tour import plan_tour
+
+PLANNERS = ("A*", "Bidirectional A*", "Octree A*", "Clearance A*")
+
+
+def load_map(path, dense=True):
+    """Read a .npy or text voxel map into a Grid."""
+    if path.endswith(".npy"):
+        occupied = np.load(path)
+        if occupied.ndim != 3 or len(set(occupied.shape)) != 1:
+            raise ValueError(f"{path}: expected a cubic 3D array, got shape {occupied.shape}")
+        if not dense:
+            raise ValueError("--sparse needs a text map")
+        grid = Grid(occupied.shape[0], step=1)
+        grid.add_barriers(np.argwhere(occupied))
+        return grid
+
+    with open(path) as f:
+        lines = [line.split("#")[0].split() for line in f]
+    lines = [line for line in lines if line]
+    if not lines:
+        raise ValueError(f"{path}: empty map")
+    grid = Grid(int(lines[0][0]), step=1, dense=dense)
+    grid.add_barriers([[int(c) for c in line] for line in lines[1:]])
+    return grid
+
+
+def read_queries(path):
+    """Yield the JSON objects of a queries file, skipping blank lines."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def path_length(path):
+    return sum(math.dist(p1, p2) for p1, p2 in zip(path, path[1:]))
+
+
+def run_query(grid, query, planner, include_path=True, include_stats=False):
+    """Plan one query; returns the output record as a dict."""
+    planner = query.get("planner", planner)
+    record = {"planner": planner}
+    try:
+        start = tuple(query["start"])
+        end = tuple(query["end"])
+        waypoints = [tuple(w) for w in query.get("waypoints", ())]
+        for point in [start, end] + waypoints:
+            if len(point) != 3 or not all(isinstance(c, int) for c in point):
+                raise ValueError(f"{list(point)} is not an [x, y, z] voxel")
+        radius = query.get("radius", 0)
+        clearance_weight = query.get("clearance_weight", 1)
+        for name, value in (("radius", radius), ("clearance_weight", clearance_weight)):
+            if not isinstance(value, (int, float)):
+                raise ValueError(f"{name} {value!r} is not a number")
+    except (KeyError, TypeError, ValueError) as e:
+        record["error"] = f"bad query: {e!r}"
+        return record
+    for point in [start, end] + waypoints:
+        if not all(0 <= c < grid.size for c in point):
+            record["error"] = f"point {list(point)} is outside the size {grid.size} grid"
+            return record
+    if planner not in PLANNERS:
+        record["error"] = f"unknown planner {planner!r}"
+        return record
+    if not grid.dense and planner != "Octree A*":
+        record["error"] = "sparse grids can only be planned with Octree A*"
+        return record
+
+    # The planners read the endpoints off the grid, like the UI sets them
+    grid.start, grid.end, grid.waypoints = start, end, waypoints
+    stats = SearchStats()
+    started = time.perf_counter()
+    try:
+        if query.get("tour") and waypoints:
+            record["planner"] = "Tour"  # plan_tour always uses find_paths
+            path = plan_tour(grid, step=1, stats=stats)
+        else:
+            path = a_star_3d(grid, step=1, bidirectional=planner == "Bidirectional A*",
+                             octree=planner == "Octree A*",
+                             radius=radius if planner == "Clearance A*" else 0,
+                             clearance_weight=clearance_weight if planner == "Clearance A*" else 0,
+                             stats=stats)
+    except ValueError as e:
+        record["error"] = str(e)
+        return record
+    elapsed = time.perf_counter() - started
+
+    record.update(found=path is not None, length=path_length(path) if path else None,
+                  points=len(path) if path else 0, expansions=stats.expansions, time=elapsed)
+    if include_path:
+        record["path"] = [list(point) for point in path] if path else None
+    if include_stats:
+        record["stats"] = stats.as_dict()
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan a file of queries on one voxel map, without the UI.")
+    parser.add_argument("map", help="map file (.npy or text)")
+    parser.add_argument("queries", help="JSON lines file of queries")
+    parser.add_argument("-p", "--planner", default="A*", choices=PLANNERS,
+                        help="planner for queries that don't name one (default: A*)")
+    parser.add_argument("-o", "--output", help="output file (default: standard output)")
+    parser.add_argument("--no-paths", action="store_true", help="leave the paths out of the output")
+    parser.add_argument("--stats", action="store_true", help="add search counters and timings to the output")
+    parser.add_argument("--sparse", action="store_true", help="load the map into a sparse grid")
+    parser.add_argument("-j", "--processes", type=int, default=1,
+                        help="plan in this many worker processes (default: 1, no workers)")
+    args = parser.parse_args(argv)
+
+    grid = load_map(args.map, dense=not args.sparse)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        if args.processes > 1:
+            from parallel import ParallelPlanner  # parallel.py imports this module for run_query
+            with ParallelPlanner(grid, args.processes) as pool:
+                records = pool.run(read_queries(args.queries), args.planner, not args.no_paths, args.stats)
+                write_records(out, records)
+        else:
+            records = (run_query(grid, query, args.planner, not args.no_paths, args.stats)
+                       for query in read_queries(args.queries))
+            write_records(out, records)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def write_records(out, records):
+    for number, record in enumerate(records):
+        out.write(json.dumps({"query": number, **record}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: bidirectional_find_path against find_path on the same random voxel maps.
+Run with: python bench_bidirectional.py [grid size]
+"""
+import random
+import sys
+import time
+import numpy as np
+from grid import Grid
+from pathfinding import find_path, bidirectional_find_path
+
+REPEATS = 3
+QUERIES = 10
+
+
+def random_grid(size, fill, seed=0):
+    grid = Grid(size)
+    rng = np.random.default_rng(seed)
+    grid.add_barriers(rng.integers(0, size, (int(size ** 3 * fill), 3)))
+    return grid
+
+
+def random_queries(grid, count, seed=0):
+    rng = random.Random(seed)
+    free = np.argwhere(~grid.grid)
+    return [(tuple(map(int, free[rng.randrange(len(free))])), tuple(map(int, free[rng.randrange(len(free))])))
+            for _ in range(count)]
+
+
+def time_search(search, grid, queries):
+    best = float("inf")
+    for _ in range(REPEATS):
+        began = time.perf_counter()
+        paths = [search(start, end, grid, 1) for start, end in queries]
+        best = min(best, time.perf_counter() - began)
+    return paths, best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    print(f"{'map':<14}{'search':<26}{'found':>7}{'total length':>14}{'total ms':>12}")
+    for name, fill in (("open", 0.0), ("random 20%", 0.2), ("random 30%", 0.3)):
+        grid = random_grid(size, fill)
+        queries = random_queries(grid, QUERIES)
+        for label, search in (("find_path", find_path), ("bidirectional_find_path", bidirectional_find_path)):
+            paths, elapsed = time_search(search, grid, queries)
+            found = [path for path in paths if path]
+            length = sum(len(path) - 1 for path in found)
+            print(f"{name:<14}{label:<26}{len(found):>7}{length:>14}{elapsed * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
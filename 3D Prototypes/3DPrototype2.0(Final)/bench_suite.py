@@ -0,0 +1,263 @@
+"""
+Benchmark suite: the 3D planners (the ones a_star_3d can use for its legs, plus the
+3DPrototype1.0 float-step A*) on seeded voxel maps of each family (open, random fill at
+several densities, forest) with a fixed set of queries per map.
+Reports per map and planner: queries solved, the mean SearchStats counters per query
+(expansions, heap pushes and stale pops) and the largest frontier, wall time
+percentiles, peak traced memory and path length relative to the 6-connected optimum
+(breadth-first search). The float-step A* also moves diagonally, so it can come out
+below 1.
+
+Run with: python bench_suite.py [--size N] [--queries N] [--save] [--baseline FILE] [--tolerance T]
+Results are compared with the stored baseline (bench_baseline.json next to this file)
+when there is one; --save stores this run as the new baseline instead. The counters
+and path lengths are deterministic, so any change there is reported; times only when
+the median is more than --tolerance (default TIME_TOLERANCE) slower.
+"""
+import argparse
+import functools
+import importlib.util
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+import weakref
+from collections import deque
+import numpy as np
+from grid import Grid
+from pathfinding import find_path, bidirectional_find_path, find_clearance_path, get_neighbors_3d
+from octree import octree_find_path
+from search_stats import SearchStats
+
+REPEATS = 3  # Each query is timed this often; the best time counts
+TIME_TOLERANCE = 0.25
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "bench_baseline.json")
+FLOAT_STEP_DIR = os.path.join(HERE, os.pardir, "3DPrototype1.0")
+COUNTERS = ("expansions", "pushes", "stale pops", "peak open")  # Deterministic, from SearchStats
+
+
+def clearance_path(start, end, grid, step, stats=None):
+    return find_clearance_path(start, end, grid, step, radius=0, clearance_weight=1, stats=stats)
+
+
+@functools.lru_cache(maxsize=None)
+def load_float_step():
+    """The 3DPrototype1.0 grid and pathfinding modules (their names clash with this prototype's)."""
+    modules = []
+    for name in ("grid", "pathfinding"):
+        spec = importlib.util.spec_from_file_location(f"float_step_{name}", os.path.join(FLOAT_STEP_DIR, f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        modules.append(module)
+    return modules
+
+
+# 3DPrototype1.0 copy of each map (see float_step_path), rebuilt when the map changes
+_float_step_grids = weakref.WeakKeyDictionary()
+
+
+def float_step_path(start, end, grid, step, stats=None):
+    """
+    The 3DPrototype1.0 float-step A* (26 moves with turn penalties) on a copy of the
+    map. A zero object size makes each barrier block exactly its own voxel.
+    """
+    float_step_grid, float_step_pathfinding = load_float_step()
+    copy = _float_step_grids.get(grid)
+    if copy is None or copy[0] != grid.version:
+        voxels = float_step_grid.Grid((grid.size * step,) * 3, step=step)
+        for barrier in grid.barriers:
+            voxels.add_barrier(*(c * step for c in barrier))
+        copy = _float_step_grids[grid] = (grid.version, voxels)
+    path = float_step_pathfinding.a_star_3d(copy[1], start, end, step=step, object_size=(0, 0, 0), stats=stats)
+    return [tuple(round(c / step) for c in point) for point in path] if path else None
+
+
+PLANNERS = (
+    ("A*", find_path),
+    ("Bidirectional A*", bidirectional_find_path),
+    ("Octree A*", octree_find_path),
+    ("Clearance A*", clearance_path),
+    ("Float-step A* (1.0)", float_step_path),
+)
+
+
+def open_map(size, seed):
+    return Grid(size)
+
+
+def random_map(fill):
+    def generate(size, seed):
+        grid = Grid(size)
+        rng = np.random.default_rng(seed)
+        grid.add_barriers(rng.integers(0, size, (int(size ** 3 * fill), 3)))
+        return grid
+    return generate
+
+
+def forest_map(size, seed, trees_per_area=0.02):
+    # Trunks standing on the ground (z = 0) with a round crown on top
+    grid = Grid(size)
+    rng = np.random.default_rng(seed)
+    x, y, z = np.indices((size, size, size))
+    occupied = np.zeros((size, size, size), dtype=bool)
+    for _ in range(int(size * size * trees_per_area)):
+        tx, ty = rng.integers(0, size, 2)
+        height = rng.integers(size // 3, size - 2)
+        radius = rng.integers(2, max(3, size // 6))
+        occupied[tx, ty, :height] = True
+        occupied |= (x - tx) ** 2 + (y - ty) ** 2 + (z - height) ** 2 <= radius ** 2
+    grid.add_barriers(np.argwhere(occupied))
+    return grid
+
+
+MAPS = (
+    ("open", open_map),
+    ("random 10%", random_map(0.1)),
+    ("random 20%", random_map(0.2)),
+    ("forest", forest_map),
+)
+
+
+def shortest_length(grid, start, end):
+    """Breadth-first search: the optimal number of 6-connected steps, or None."""
+    seen = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        if node == end:
+            return seen[node]
+        for neighbor in get_neighbors_3d(node, grid, 1):
+            if neighbor not in seen and not grid.is_collision(neighbor):
+                seen[neighbor] = seen[node] + 1
+                queue.append(neighbor)
+    return None
+
+
+def make_queries(grid, count, seed):
+    """Seeded start/end pairs on free voxels that are connected, with their optimal length."""
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(~grid.grid)
+    queries = []
+    for _ in range(count * 20):
+        if len(queries) == count:
+            break
+        start, end = (tuple(map(int, free[i])) for i in rng.integers(0, len(free), 2))
+        optimum = shortest_length(grid, start, end)
+        if optimum:
+            queries.append((start, end, optimum))
+    return queries
+
+
+def path_length(path):
+    return sum(math.dist(p1, p2) for p1, p2 in zip(path, path[1:]))
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def run_planner(search, grid, queries):
+    """Stats of one planner over a query set."""
+    # Round-robin over the queries; the octree and distance field are built once per
+    # map, during the first round
+    times = [float("inf")] * len(queries)
+    for _ in range(REPEATS):
+        paths = []
+        for i, (start, end, _) in enumerate(queries):
+            began = time.perf_counter()
+            paths.append(search(start, end, grid, 1))
+            times[i] = min(times[i], time.perf_counter() - began)
+
+    ratios = [path_length(path) / optimum for path, (_, _, optimum) in zip(paths, queries) if path]
+
+    # Memory and search counters in a separate pass: tracing and recording stats slow the
+    # searches down too much to time them
+    peak = 0
+    stats = []
+    for start, end, _ in queries:
+        stats.append(SearchStats())
+        tracemalloc.start()
+        search(start, end, grid, 1, stats=stats[-1])
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "solved": len(ratios),
+        "expansions": sum(s.expansions for s in stats) / len(stats),
+        "pushes": sum(s.pushes for s in stats) / len(stats),
+        "stale pops": sum(s.stale_pops for s in stats) / len(stats),
+        "peak open": max(s.peak_open for s in stats),
+        "p50 ms": percentile(times, 50) * 1e3,
+        "p90 ms": percentile(times, 90) * 1e3,
+        "p99 ms": percentile(times, 99) * 1e3,
+        "peak KiB": peak / 1024,
+        "length ratio": sum(ratios) / len(ratios) if ratios else None,
+        "worst ratio": max(ratios) if ratios else None,
+    }
+
+
+def compare(results, baseline, tolerance=TIME_TOLERANCE):
+    """Differences of results from a baseline that count as regressions, as messages."""
+    problems = []
+    for key, stats in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for field in ("solved",) + COUNTERS + ("length ratio", "worst ratio"):
+            if old[field] is not None and stats[field] is not None and abs(stats[field] - old[field]) > 1e-9:
+                problems.append(f"{key}: {field} changed {old[field]:.4g} -> {stats[field]:.4g}")
+        if stats["p50 ms"] > old["p50 ms"] * (1 + tolerance):
+            problems.append(f"{key}: p50 slower {old['p50 ms']:.2f} ms -> {stats['p50 ms']:.2f} ms")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the 3D planners on seeded map families.")
+    parser.add_argument("--size", type=int, default=24, help="map side in voxels (default: 24)")
+    parser.add_argument("--queries", type=int, default=10, help="queries per map (default: 10)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help="allowed median time increase as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    columns = ("solved",) + COUNTERS + ("p50 ms", "p90 ms", "p99 ms", "peak KiB", "length ratio", "worst ratio")
+    print(f"{'map':<12}{'planner':<22}" + "".join(f"{column:>13}" for column in columns))
+    results = {}
+    for name, generate in MAPS:
+        grid = generate(args.size, args.seed)
+        queries = make_queries(grid, args.queries, args.seed)
+        for label, search in PLANNERS:
+            stats = results[f"{name} / {label}"] = run_planner(search, grid, queries)
+            print(f"{name:<12}{label:<22}" + "".join(
+                f"{'-' if stats[column] is None else format(stats[column], '.4g'):>13}" for column in columns))
+
+    # Results only compare with a baseline from the same settings
+    run = {"size": args.size, "queries": args.queries, "seed": args.seed, "results": results}
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=1)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if any(baseline[key] != run[key] for key in ("size", "queries", "seed")):
+        print("Baseline was recorded with other settings; not comparing.")
+        return
+    problems = compare(results, baseline["results"], args.tolerance)
+    for problem in problems:
+        print("REGRESSION", problem)
+    if problems:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import math
+import weakref
+import numpy as np
+
+MAX_DISTANCE = 8  # Distances are capped here (in voxels): more clearance than this makes no difference
+
+
+def along(axis, start, stop):
+    """Index of the slab start:stop along one axis of a 3D array."""
+    index = [slice(None)] * 3
+    index[axis] = slice(start, stop)
+    return tuple(index)
+
+
+def distance_transform(occupied, max_distance=MAX_DISTANCE):
+    """
+    Euclidean distance (in voxels) from every voxel to the nearest True voxel of a 3D
+    boolean array, capped at max_distance.
+    Separable like the exact EDT: squared distances are the sum of squared offsets along
+    each axis, so three 1D passes of d(q) = min over i of f(i) + (q - i)^2 give the exact
+    transform. Because of the cap, i only has to range over q +- max_distance (a closer
+    barrier is never further than that along any one axis), which turns each pass into a
+    few shifted numpy minimums over the whole array.
+    """
+    reach = math.ceil(max_distance)
+    # Stand-in for "no barrier in range": more than any squared distance that survives the cap
+    far = float((reach + 1) ** 2)
+    f = np.where(occupied, 0.0, far)
+    for axis in range(3):
+        n = f.shape[axis]
+        d = f.copy()
+        for offset in range(1, min(reach, n - 1) + 1):
+            penalty = offset * offset
+            # Nearest barrier `offset` voxels ahead, then `offset` voxels behind
+            lower, upper = d[along(axis, 0, n - offset)], d[along(axis, offset, n)]
+            np.minimum(lower, f[along(axis, offset, n)] + penalty, out=lower)
+            np.minimum(upper, f[along(axis, 0, n - offset)] + penalty, out=upper)
+        f = d
+    return np.minimum(np.sqrt(f), max_distance)
+
+
+class DistanceField:
+    """
+    Capped Euclidean distance from every voxel of a dense Grid to its nearest barrier
+    voxel (barrier centers are points; barriers themselves have distance 0).
+    Built once, then kept in step with the grid's edit log: added barriers only lower
+    distances within max_distance of themselves, so they are stamped in locally; removed
+    barriers (or a clear) rebuild the field.
+    """
+
+    def __init__(self, grid, max_distance=MAX_DISTANCE):
+        if not grid.dense:
+            raise ValueError("A distance field needs a dense grid.")
+        self.grid = grid
+        self.max_distance = max_distance
+
+        # Distances from a voxel to the voxels around it, for stamping in added barriers
+        reach = math.ceil(max_distance)
+        offsets = np.arange(-reach, reach + 1)
+        dx, dy, dz = np.meshgrid(offsets, offsets, offsets, indexing="ij")
+        self.reach = reach
+        self.kernel = np.minimum(np.sqrt(dx * dx + dy * dy + dz * dz), max_distance)
+        self.build()
+
+    def build(self):
+        self.distance = distance_transform(self.grid.grid, self.max_distance)
+        self.version = self.grid.version
+
+    def update(self):
+        """Bring the field up to date with the grid's barriers."""
+        changes = self.grid.changes_since(self.version)
+        if changes is None or any(not added for added, _ in changes):
+            self.build()
+            return
+        added = [voxel for _, voxels in changes for voxel in voxels]
+        if len(added) * self.kernel.size > self.distance.size:
+            self.build()  # Cheaper to start over than to stamp them all in
+            return
+        for voxel in added:
+            self.stamp(voxel)
+        self.version = self.grid.version
+
+    def stamp(self, voxel):
+        # Lower the distances around a new barrier voxel (clipping the kernel at the grid's edges)
+        size = self.grid.size
+        reach = self.reach
+        region = []
+        window = []
+        for c in voxel:
+            low, high = max(c - reach, 0), min(c + reach + 1, size)
+            region.append(slice(low, high))
+            window.append(slice(low - (c - reach), high - (c - reach)))
+        target = self.distance[tuple(region)]
+        np.minimum(target, self.kernel[tuple(window)], out=target)
+
+    def distance_at(self, position):
+        x, y, z = position
+        return self.distance.item(x, y, z)
+
+    def is_safe(self, position, radius):
+        """
+        O(1): can a drone of this radius (in voxels, below max_distance) sit at a voxel
+        without reaching a barrier's center? Points outside the grid are never safe.
+        """
+        x, y, z = position
+        size = self.grid.size
+        return 0 <= x < size and 0 <= y < size and 0 <= z < size and self.distance.item(x, y, z) > radius
+
+    def clearance_cost(self, position):
+        """Extra cost of being at a voxel: 1 touching a barrier, falling to 0 at max_distance."""
+        x, y, z = position
+        return 1 - self.distance.item(x, y, z) / self.max_distance
+
+
+# One field per grid, kept up to date with its edits
+_fields = weakref.WeakKeyDictionary()
+
+
+def distance_field(grid, max_distance=MAX_DISTANCE):
+    """The grid's DistanceField, built on first use and updated to the grid's current barriers."""
+    field = _fields.get(grid)
+    if field is None or field.max_distance != max_distance:
+        field = _fields[grid] = DistanceField(grid, max_distance)
+    else:
+        field.update()
+    return field
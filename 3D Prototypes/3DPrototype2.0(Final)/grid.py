@@ -1,23 +1,161 @@
 import numpy as np
 
+MASK64 = (1 << 64) - 1
+
+def cell_hash(index):
+    """Pseudo-random 64-bit key of a voxel (splitmix64), XORed into the grid fingerprint."""
+    z = (index + 0x9E3779B97F4A7C15) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+def cell_hashes(indices):
+    """cell_hash for a numpy array of indices (uint64 arithmetic wraps like the masks above)."""
+    z = indices.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
 class Grid:
-    def __init__(self, size=5, step=1):
+    def __init__(self, size=5, step=1, dense=True):
         self.size = size  # Store the size as a tuple (x_size, y_size, z_size)
         self.step = step
-        self.grid = np.zeros((size, size, size))  # Initialize a grid
-        self.barriers = []  # Store barriers as coordinate tuples
+        # Voxel occupancy: True where there is a barrier. This is what collision checks read.
+        # With dense=False there is no size**3 array: barriers live in the hash set
+        # self.occupied only, so memory grows with the obstacles instead of the volume
+        # (plan over such grids with octree.py).
+        self.dense = dense
+        self.grid = np.zeros((size, size, size), dtype=bool) if dense else None
+        self.occupied = set()  # Barrier voxels as tuples (sparse grids only)
+        self._barriers = []  # See the barriers property
+        self.version = 0  # Bumped on every barrier change, so cached planning results can tell they're stale
+        # One entry per version: (True, added voxels) or (False, removed voxels), None for a clear
+        # (see changes_since)
+        self.edits = []
+        # Hash of the barrier set: XOR of cell_hash over all barrier voxels, kept up to date on
+        # every change, so equal barrier layouts give equal fingerprints (see path_cache.py)
+        self.fingerprint = 0
 
         # Initialize start, waypoints, and end as None
         self.start = None
         self.waypoints = []
         self.end = None
 
+    @classmethod
+    def from_occupancy(cls, occupancy, step=1):
+        """
+        A dense Grid that plans on an existing cubic boolean voxel array (e.g. one in
+        shared memory) without copying it. The edit log starts with a clear, so anything
+        tracking edits treats all voxels as changed. The barrier list is only read off
+        the array when it is first used.
+        Args:
+            occupancy: (size, size, size) bool array, True = barrier.
+            step: Grid step.
+        """
+        grid = cls(occupancy.shape[0], step=step, dense=False)  # Skip allocating a voxel array of its own
+        grid.dense = True
+        grid.grid = occupancy
+        grid._barriers = None
+        grid.edits.append(None)
+        grid.version += 1
+        grid.fingerprint = int(np.bitwise_xor.reduce(cell_hashes(np.flatnonzero(occupancy)), initial=np.uint64(0)))
+        return grid
+
+    @property
+    def barriers(self):
+        """Barriers as coordinate tuples, in the order they were added (for drawing and the octree)."""
+        if self._barriers is None:
+            self._barriers = self.barrier_voxels()
+        return self._barriers
+
+    def barrier_voxels(self):
+        """Barrier coordinates read off the voxel array, as a list of tuples (dense grids only)."""
+        return list(map(tuple, np.argwhere(self.grid).tolist()))
+
+    def has_barrier(self, x, y, z):
+        return self.grid.item(x, y, z) if self.dense else (x, y, z) in self.occupied
+
     def add_barrier(self, x, y, z):
-        self.barriers.append((x, y, z))
+        if not self.has_barrier(x, y, z):
+            barriers = self.barriers  # List them before the voxel array changes
+            if self.dense:
+                self.grid[x, y, z] = True
+            else:
+                self.occupied.add((x, y, z))
+            barriers.append((x, y, z))
+            self.edits.append((True, [(x, y, z)]))
+            self.version += 1
+            self.fingerprint ^= cell_hash(self.voxel_index(x, y, z))
+
+    def add_barriers(self, points):
+        """
+        Bulk-load barriers from any (N, 3) sequence or array of integer coordinates.
+        Duplicates (in the input or already on the grid) are ignored.
+        """
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 3)
+        if not np.all((points >= 0) & (points < self.size)):
+            raise ValueError("Barrier coordinates out of range.")
+
+        # Keep only points that are not barriers yet, each once
+        points = np.unique(points, axis=0)
+        barriers = self.barriers  # List them before the voxel array changes
+        if self.dense:
+            points = points[~self.grid[points[:, 0], points[:, 1], points[:, 2]]]
+            self.grid[points[:, 0], points[:, 1], points[:, 2]] = True
+            added = list(map(tuple, points.tolist()))
+        else:
+            added = [point for point in map(tuple, points.tolist()) if point not in self.occupied]
+            self.occupied.update(added)
+            points = np.array(added, dtype=np.int64).reshape(-1, 3)
+
+        barriers.extend(added)
+        if len(points):
+            self.edits.append((True, added))
+            self.version += 1
+            indices = np.ravel_multi_index(points.T, (self.size,) * 3)
+            self.fingerprint ^= int(np.bitwise_xor.reduce(cell_hashes(indices)))
+
+    def remove_barrier(self, x, y, z):
+        if self.has_barrier(x, y, z):
+            barriers = self.barriers  # List them before the voxel array changes
+            if self.dense:
+                self.grid[x, y, z] = False
+            else:
+                self.occupied.discard((x, y, z))
+            barriers.remove((x, y, z))
+            self.edits.append((False, [(x, y, z)]))
+            self.version += 1
+            self.fingerprint ^= cell_hash(self.voxel_index(x, y, z))
+
+    def clear_barriers(self):
+        if self.dense:
+            self.grid[...] = False
+        self.occupied.clear()
+        self._barriers = []
+        self.edits.append(None)
+        self.version += 1
+        self.fingerprint = 0
+
+    def changes_since(self, version):
+        """
+        The (added, voxels) edits made after `version`, oldest first, or None if the
+        barriers were cleared since then and everything has to be treated as changed.
+        """
+        changes = self.edits[version:]
+        if None in changes:
+            return None
+        return changes
+
+    def voxel_index(self, x, y, z):
+        return (x * self.size + y) * self.size + z
 
     def add_waypoint(self, x, y, z):
         self.waypoints.append((x, y, z))
 
     def is_collision(self, position):
-        # Check if the given position is in the list of barriers
-        return position in self.barriers
+        # Constant-time lookup in the voxel array (or hash set); points outside the grid never collide
+        x, y, z = position
+        size = self.size
+        if not (0 <= x < size and 0 <= y < size and 0 <= z < size):
+            return False
+        return self.grid.item(x, y, z) if self.dense else (x, y, z) in self.occupied
@@ -1,14 +1,27 @@
 import tkinter as tk
 from grid import Grid
 from pathfinding import a_star_3d
+from replanner import replan_3d
+from tour import plan_tour
+from path_cache import PathCache
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import time  # Import the time module for measuring processing time
 
+# Used when "Keep clearance" is checked (see find_clearance_path)
+DRONE_RADIUS = 1  # In voxels
+CLEARANCE_WEIGHT = 2
+
 class Main():
     def __init__(self, grid_size):
         self.grid = Grid(grid_size, step=1)
         self.processing_time_label = None  # Placeholder for the processing time label
+        self.replanners = {}  # D* Lite state per route leg, kept between Replan clicks
+        self.optimize_order = None  # tk.BooleanVar for the "Optimize waypoint order" checkbox
+        self.path_cache = PathCache(maxsize=64)  # Repeated Generate Path presses on an unchanged grid
+        self.bidirectional = None  # tk.BooleanVar for the "Bidirectional search" checkbox
+        self.octree = None  # tk.BooleanVar for the "Octree search" checkbox
+        self.keep_clearance = None  # tk.BooleanVar for the "Keep clearance" checkbox
 
     def draw_initial_grid(self, canvas):
         grid = self.grid
@@ -64,13 +77,29 @@ class Main():
                 vector = (path[i + 1][0] - path[i][0], path[i + 1][1] - path[i][1], path[i + 1][2] - path[i][2])
                 f.write(f"{vector}\n")  # Write the vector to the file
 
-    def generate_path_and_display(self, canvas):
+    def generate_path_and_display(self, canvas, incremental=False):
         if not self.grid.start or not self.grid.end:
             print("Please ensure start and end points are defined.")
             return
 
         start_time = time.time()  # Start the timer
-        final_path = a_star_3d(self.grid, step=1)
+        if incremental:
+            # Repair the previous search (D* Lite) instead of planning from scratch
+            final_path = replan_3d(self.grid, self.replanners, step=1)
+        elif self.optimize_order is not None and self.optimize_order.get():
+            # Reorder the waypoints for the shortest total route
+            final_path = self.path_cache.plan(self.grid, "Tour", lambda: plan_tour(self.grid, step=1))
+        else:
+            bidirectional = self.bidirectional is not None and self.bidirectional.get()
+            octree = self.octree is not None and self.octree.get()
+            mode = "Octree A*" if octree else "Bidirectional A*" if bidirectional else "A*"
+            radius, clearance_weight = 0, 0
+            if self.keep_clearance is not None and self.keep_clearance.get():
+                radius, clearance_weight = DRONE_RADIUS, CLEARANCE_WEIGHT
+                mode = ("Clearance A*", radius, clearance_weight)
+            final_path = self.path_cache.plan(self.grid, mode, lambda: a_star_3d(self.grid, step=1, bidirectional=bidirectional,
+                                                                                 octree=octree, radius=radius,
+                                                                                 clearance_weight=clearance_weight))
         end_time = time.time()  # End the timer
 
         processing_time = end_time - start_time  # Calculate processing time
@@ -103,7 +132,7 @@ class Main():
                 if (x, y, z) == self.grid.end:
                     print("An End point already exists at this location.")
                     return
-                if (x, y, z) in self.grid.barriers:
+                if self.grid.is_collision((x, y, z)):
                     print("A Barrier already exists at this location.")
                     return
                 if (x, y, z) in self.grid.waypoints:
@@ -136,10 +165,11 @@ class Main():
             print("Invalid input for coordinates. Please enter whole numeric values less than 5.")
 
     def clear_grid(self, canvas):
-        self.grid.barriers.clear()
+        self.grid.clear_barriers()
         self.grid.start = None
         self.grid.end = None
         self.grid.waypoints.clear()
+        self.replanners.clear()
         print("All points cleared.")
         self.draw_initial_grid(canvas)
 
@@ -154,8 +184,7 @@ class Main():
             (6, 3, 3), (5, 1, 4), (0, 4, 2), (7, 1, 6), (6, 7, 7), (2, 6, 0),
             (3, 1, 1), (4, 6, 4), (5, 0, 3), (6, 5, 2), (3, 2, 6), (7, 4, 4)
         ]
-        for barrier in barriers:
-            self.grid.add_barrier(*barrier)
+        self.grid.add_barriers(barriers)
 
         # Set the start and end points on opposite sides of the grid
         self.grid.start = (0, 0, 0)
@@ -214,6 +243,26 @@ class Main():
                                  command=lambda: self.generate_path_and_display(canvas))
         btn_generate.grid(row=2, column=0, pady=5, sticky=tk.W)
 
+        btn_replan = tk.Button(button_frame, text="Replan",
+                               command=lambda: self.generate_path_and_display(canvas, incremental=True))
+        btn_replan.grid(row=3, column=0, pady=5, sticky=tk.W)
+
+        self.optimize_order = tk.BooleanVar(value=False)
+        chk_optimize = tk.Checkbutton(button_frame, text="Optimize waypoint order", variable=self.optimize_order)
+        chk_optimize.grid(row=4, column=0, pady=5, sticky=tk.W)
+
+        self.bidirectional = tk.BooleanVar(value=False)
+        chk_bidirectional = tk.Checkbutton(button_frame, text="Bidirectional search", variable=self.bidirectional)
+        chk_bidirectional.grid(row=5, column=0, pady=5, sticky=tk.W)
+
+        self.octree = tk.BooleanVar(value=False)
+        chk_octree = tk.Checkbutton(button_frame, text="Octree search", variable=self.octree)
+        chk_octree.grid(row=6, column=0, pady=5, sticky=tk.W)
+
+        self.keep_clearance = tk.BooleanVar(value=False)
+        chk_clearance = tk.Checkbutton(button_frame, text="Keep clearance", variable=self.keep_clearance)
+        chk_clearance.grid(row=7, column=0, pady=5, sticky=tk.W)
+
         self.draw_initial_grid(canvas)
 
         root.mainloop()
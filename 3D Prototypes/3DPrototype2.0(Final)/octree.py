@@ -0,0 +1,255 @@
+import heapq
+import itertools
+import weakref
+import numpy as np
+
+
+class OctreeNode:
+    """A cube of voxels [x, x + side) x [y, y + side) x [z, z + side)."""
+
+    __slots__ = ("x", "y", "z", "side", "children", "free")
+
+    def __init__(self, x, y, z, side, children=None, free=False):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.side = side
+        self.children = children  # None for a leaf
+        self.free = free  # Leaves only: True if the whole cube is free space
+
+    @property
+    def key(self):
+        return self.x, self.y, self.z, self.side
+
+    def contains(self, point):
+        x, y, z = point
+        side = self.side
+        return self.x <= x < self.x + side and self.y <= y < self.y + side and self.z <= z < self.z + side
+
+
+class Octree:
+    """
+    Octree over the grid's voxels: a cube is split into 8 children only while it is partly
+    blocked (or sticks out of the grid), so large empty and large solid regions are single
+    leaves and the node count grows with the obstacles' surface instead of the volume.
+    """
+
+    def __init__(self, size, barriers):
+        self.size = size
+        side = 1
+        while side < size:
+            side *= 2
+        points = np.unique(np.asarray(barriers, dtype=np.int64).reshape(-1, 3), axis=0)
+        self.node_count = 0
+        self.root = self._build(0, 0, 0, side, points)
+
+    def _build(self, x, y, z, side, points):
+        size = self.size
+        if x >= size or y >= size or z >= size:
+            return None  # Entirely outside the grid
+        self.node_count += 1
+        inside = x + side <= size and y + side <= size and z + side <= size
+        if inside and len(points) == 0:
+            return OctreeNode(x, y, z, side, free=True)
+        if inside and len(points) == side ** 3:
+            return OctreeNode(x, y, z, side, free=False)  # Solid (points are unique)
+
+        half = side // 2
+        children = []
+        high = points >= np.array([x + half, y + half, z + half])
+        for dx, dy, dz in itertools.product((0, 1), repeat=3):
+            octant = points[(high[:, 0] == dx) & (high[:, 1] == dy) & (high[:, 2] == dz)]
+            child = self._build(x + dx * half, y + dy * half, z + dz * half, half, octant)
+            if child is not None:
+                children.append(child)
+        return OctreeNode(x, y, z, side, children)
+
+    def locate(self, point):
+        """The leaf containing a voxel, or None outside the grid."""
+        node = self.root
+        if node is None or not node.contains(point):
+            return None
+        while node.children is not None:
+            node = next((child for child in node.children if child.contains(point)), None)
+            if node is None:
+                return None
+        return node
+
+    def free_leaves_in(self, low, high):
+        """Free leaves overlapping the box low <= voxel < high."""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            side = node.side
+            if (node.x >= high[0] or node.x + side <= low[0] or node.y >= high[1] or node.y + side <= low[1]
+                    or node.z >= high[2] or node.z + side <= low[2]):
+                continue
+            if node.children is None:
+                if node.free:
+                    found.append(node)
+            else:
+                stack.extend(node.children)
+        return found
+
+    def neighbors(self, leaf):
+        """Free leaves sharing a face with a leaf."""
+        x, y, z, side = leaf.x, leaf.y, leaf.z, leaf.side
+        slabs = (
+            ((x + side, y, z), (x + side + 1, y + side, z + side)),
+            ((x - 1, y, z), (x, y + side, z + side)),
+            ((x, y + side, z), (x + side, y + side + 1, z + side)),
+            ((x, y - 1, z), (x + side, y, z + side)),
+            ((x, y, z + side), (x + side, y + side, z + side + 1)),
+            ((x, y, z - 1), (x + side, y + side, z)),
+        )
+        return [other for low, high in slabs for other in self.free_leaves_in(low, high)]
+
+
+def center(leaf):
+    offset = (leaf.side - 1) / 2
+    return leaf.x + offset, leaf.y + offset, leaf.z + offset
+
+
+def manhattan(p1, p2):
+    return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1]) + abs(p1[2] - p2[2])
+
+
+def portal(leaf, other, toward):
+    """
+    The pair of face-adjacent voxels (one in each leaf) where a path crosses from leaf to
+    other: the point of their shared face closest to `toward`.
+    """
+    voxel = []
+    for axis, (low, side, other_low, other_side) in enumerate(((leaf.x, leaf.side, other.x, other.side),
+                                                               (leaf.y, leaf.side, other.y, other.side),
+                                                               (leaf.z, leaf.side, other.z, other.side))):
+        # Overlap of the two cubes along this axis (empty along the axis they touch on)
+        start, stop = max(low, other_low), min(low + side, other_low + other_side)
+        if start < stop:
+            voxel.append(min(max(round(toward[axis]), start), stop - 1))
+        else:
+            voxel.append(None)
+    axis = voxel.index(None)
+    inside, outside = list(voxel), list(voxel)
+    if other.key[axis] > leaf.key[axis]:
+        inside[axis], outside[axis] = other.key[axis] - 1, other.key[axis]
+    else:
+        inside[axis], outside[axis] = leaf.key[axis], leaf.key[axis] - 1
+    return tuple(inside), tuple(outside)
+
+
+def staircase(a, b):
+    """6-connected voxel steps from a to b (both excluded), always along the axis with the most left to go."""
+    steps = []
+    current = list(a)
+    while tuple(current) != tuple(b):
+        axis = max(range(3), key=lambda i: abs(b[i] - current[i]))
+        current[axis] += 1 if b[axis] > current[axis] else -1
+        steps.append(tuple(current))
+    return steps[:-1]
+
+
+class OctreePlanner:
+    """
+    A* over the free leaves of an Octree instead of over single voxels. Leaves are
+    linked when they share a face; the cost of a move is the Manhattan distance between
+    the leaves' centers (the actual start and end points for their leaves), and the
+    heuristic is the Manhattan distance to the end, so it stays consistent.
+    The leaf sequence is turned back into a 6-connected voxel path: through the portal
+    voxels between consecutive leaves, with straight staircases inside each (convex) leaf.
+    Paths are near-optimal, the price of searching a few big cells instead of many voxels.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.version = None
+        self.octree = None
+        self._neighbors = {}
+
+    def update(self):
+        # Rebuild the tree when the barriers changed since it was built
+        if self.version != self.grid.version:
+            self.octree = Octree(self.grid.size, self.grid.barriers)
+            self._neighbors = {}
+            self.version = self.grid.version
+
+    def neighbors(self, leaf):
+        found = self._neighbors.get(leaf.key)
+        if found is None:
+            found = self._neighbors[leaf.key] = self.octree.neighbors(leaf)
+        return found
+
+    def find_path(self, start, end, stats=None):
+        # With a SearchStats as stats: leaves count as nodes, neighbor_time is leaf
+        # adjacency and collision_time locating the start and end leaves
+        self.update()
+        neighbors = self.neighbors
+        locate = self.octree.locate
+        if stats is not None:
+            neighbors = stats.timed(neighbors, "neighbor_time")
+            locate = stats.timed(locate, "collision_time")
+        start_leaf = locate(start)
+        end_leaf = locate(end)
+        if start_leaf is None or end_leaf is None or not start_leaf.free or not end_leaf.free:
+            return None
+
+        def point(leaf):
+            if leaf is start_leaf:
+                return start
+            if leaf is end_leaf:
+                return end
+            return center(leaf)
+
+        counter = itertools.count()
+        frontier = [(manhattan(start, end), next(counter), start_leaf)]
+        cost_so_far = {start_leaf.key: 0}
+        came_from = {start_leaf.key: None}
+        pops = stale_pops = peak = 0
+        while frontier:
+            priority, _, leaf = heapq.heappop(frontier)
+            if stats is not None:
+                pops += 1
+                peak = max(peak, len(frontier) + 1)
+                if priority > cost_so_far[leaf.key] + manhattan(point(leaf), end):
+                    stale_pops += 1
+            if leaf is end_leaf:
+                break
+            leaf_point = point(leaf)
+            for other in neighbors(leaf):
+                other_point = point(other)
+                new_cost = cost_so_far[leaf.key] + manhattan(leaf_point, other_point)
+                if other.key not in cost_so_far or new_cost < cost_so_far[other.key]:
+                    cost_so_far[other.key] = new_cost
+                    came_from[other.key] = leaf
+                    heapq.heappush(frontier, (new_cost + manhattan(other_point, end), next(counter), other))
+
+        if stats is not None:
+            stats.add_search(pops - (end_leaf.key in came_from), pops + len(frontier), stale_pops, peak)
+        if end_leaf.key not in came_from:
+            return None  # No path found
+
+        leaves = [end_leaf]
+        while came_from[leaves[-1].key] is not None:
+            leaves.append(came_from[leaves[-1].key])
+        leaves.reverse()
+
+        # Refine to voxels: cross each pair of consecutive leaves at their portal
+        path = [start]
+        for leaf, other in zip(leaves, leaves[1:]):
+            inside, outside = portal(leaf, other, point(other))
+            path += staircase(path[-1], inside) + ([inside] if inside != path[-1] else []) + [outside]
+        path += staircase(path[-1], end) + ([end] if end != path[-1] else [])
+        return path
+
+
+# One planner per grid, rebuilt when the grid's barriers change
+_planners = weakref.WeakKeyDictionary()
+
+
+def octree_find_path(start, end, grid, step=1, stats=None):
+    """Same interface as find_path, planned over the grid's octree (see OctreePlanner)."""
+    planner = _planners.get(grid)
+    if planner is None:
+        planner = _planners[grid] = OctreePlanner(grid)
+    return planner.find_path(start, end, stats)
@@ -0,0 +1,89 @@
+"""
+Run independent planning queries on one static map in a pool of worker processes.
+The map goes to the workers once, through shared memory: a dense grid's voxel array is
+shared as is (workers plan straight on it, without a copy), a sparse grid's barrier
+coordinates are shared and each worker loads them into its own sparse Grid. Tasks then
+only carry the queries, sent in chunks so the per-task overhead is spread out.
+
+    with ParallelPlanner(grid, processes=8) as pool:
+        records = list(pool.run(queries, planner="A*"))
+
+Queries and records are the same as batch.py's (see run_query).
+"""
+import math
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from grid import Grid
+from batch import run_query
+
+CHUNKS_PER_PROCESS = 4  # More, smaller chunks even out queries that take longer than others
+
+# Worker process state (set by _init_worker)
+_shared = None
+_grid = None
+
+
+def _init_worker(name, shape, dense, step):
+    global _shared, _grid
+    _shared = shared_memory.SharedMemory(name=name)
+    if dense:
+        _grid = Grid.from_occupancy(np.ndarray(shape, dtype=bool, buffer=_shared.buf), step)
+    else:
+        size, count = shape
+        _grid = Grid(size, step=step, dense=False)
+        _grid.add_barriers(np.ndarray((count, 3), dtype=np.int64, buffer=_shared.buf))
+
+
+def _run_chunk(args):
+    queries, planner, include_path, include_stats = args
+    return [run_query(_grid, query, planner, include_path, include_stats) for query in queries]
+
+
+class ParallelPlanner:
+    """
+    Process pool that plans queries on a snapshot of a grid's barriers (later edits to
+    the grid are not seen by the workers). Use as a context manager, or call close().
+    """
+
+    def __init__(self, grid, processes=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        if grid.dense:
+            data, shape = grid.grid, grid.grid.shape
+        else:
+            data = np.array(grid.barriers, dtype=np.int64).reshape(-1, 3)
+            shape = (grid.size, len(data))
+        self.shared = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        np.ndarray(data.shape, dtype=data.dtype, buffer=self.shared.buf)[...] = data
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                         initargs=(self.shared.name, shape, grid.dense, grid.step))
+
+    def run(self, queries, planner="A*", include_path=True, include_stats=False, chunksize=None):
+        """
+        Plan all queries; yields their records in query order as the chunks complete.
+        Args:
+            queries: List of query dicts (see batch.py).
+            planner: Planner for queries that don't name one.
+            include_path: Whether the records include the paths.
+            include_stats: Whether the records include the search stats.
+            chunksize: (Optional) Queries per task; by default each process gets about
+                CHUNKS_PER_PROCESS chunks.
+        """
+        queries = list(queries)
+        if chunksize is None:
+            chunksize = max(1, math.ceil(len(queries) / (self.processes * CHUNKS_PER_PROCESS)))
+        chunks = [(queries[i:i + chunksize], planner, include_path, include_stats) for i in range(0, len(queries), chunksize)]
+        for records in self.pool.imap(_run_chunk, chunks):
+            yield from records
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.shared.close()
+        self.shared.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
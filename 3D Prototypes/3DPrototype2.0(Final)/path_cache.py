@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+
+class PathCache:
+    """
+    LRU cache of complete paths, keyed by the grid's barrier fingerprint, the planner mode
+    and the endpoints (start, waypoints, end).
+    Editing a barrier changes the fingerprint, so stale paths are simply never looked up
+    again and age out of the cache; putting the barriers back the way they were makes the
+    old paths hit again.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, grid, mode):
+        return (grid.size, grid.fingerprint, mode, grid.start, tuple(grid.waypoints), grid.end)
+
+    def get(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return self.entries[key]
+
+    def put(self, key, path):
+        self.entries[key] = path
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def plan(self, grid, mode, planner):
+        """
+        Return the cached path for this grid state and mode, or call planner() (no
+        arguments) and cache what it returns. Failed searches (None) are cached too.
+        """
+        key = self.key(grid, mode)
+        if key in self.entries:
+            return self.get(key)
+        self.misses += 1
+        path = planner()
+        self.put(key, path)
+        return path
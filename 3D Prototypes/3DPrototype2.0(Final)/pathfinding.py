@@ -1,7 +1,20 @@
 import heapq
-import numpy as np
+import math
+from distance_field import distance_field
+from octree import octree_find_path
 
-def a_star_3d(grid, step):
+def a_star_3d(grid, step, bidirectional=False, octree=False, radius=0, clearance_weight=0, stats=None):
+    # bidirectional=True plans every leg with bidirectional_find_path instead of find_path,
+    # octree=True over the free leaves of an octree (octree_find_path, near-optimal).
+    # A radius or clearance weight plans with find_clearance_path.
+    # A SearchStats (search_stats.py) passed as stats adds up the counters of all legs.
+    if radius or clearance_weight:
+        def search(start, end, grid, step, stats=None):
+            return find_clearance_path(start, end, grid, step, radius, clearance_weight, stats)
+    elif octree:
+        search = octree_find_path
+    else:
+        search = bidirectional_find_path if bidirectional else find_path
     waypoints = grid.waypoints
     start = grid.start
     end = grid.end
@@ -12,34 +25,48 @@ def a_star_3d(grid, step):
 
     # Visit each waypoint in order
     for waypoint in waypoints:
-        path_to_waypoint = find_path(current_position, waypoint, grid, step)
+        path_to_waypoint = search(current_position, waypoint, grid, step, stats=stats)
         if path_to_waypoint is None:
             return None  # No path found to waypoint
         full_path.extend(path_to_waypoint[:-1])  # Exclude the current position, add all but the last point
         current_position = waypoint
 
     # Finally, find the path from the last waypoint to the end
-    path_to_end = find_path(current_position, end, grid, step)
+    path_to_end = search(current_position, end, grid, step, stats=stats)
     if path_to_end is None:
         return None  # No path found to end
     full_path.extend(path_to_end)
 
     return full_path
 
-def find_path(start, end, grid, step):
+def find_path(start, end, grid, step, stats=None):
+    # With a SearchStats as stats, the counters and neighbor/collision times are recorded
+    # into it. There is no closed set: a stale entry is expanded again, so it counts as
+    # an expansion as well as a stale pop.
+    neighbors_of = get_neighbors_3d
+    is_collision = grid.is_collision
+    if stats is not None:
+        neighbors_of = stats.timed(neighbors_of, "neighbor_time")
+        is_collision = stats.timed(is_collision, "collision_time")
     frontier = []
     heapq.heappush(frontier, (0, start))
     cost_so_far = {start: 0}
     came_from = {start: None}
+    pops = stale_pops = peak = 0
 
     while frontier:
-        _, current_node = heapq.heappop(frontier)
+        priority, current_node = heapq.heappop(frontier)
+        if stats is not None:
+            pops += 1
+            peak = max(peak, len(frontier) + 1)
+            if priority > cost_so_far[current_node] + heuristic(current_node, end):
+                stale_pops += 1
 
         if current_node == end:
             break
 
-        for neighbor in get_neighbors_3d(current_node, grid, step):
-            if grid.is_collision(neighbor):
+        for neighbor in neighbors_of(current_node, grid, step):
+            if is_collision(neighbor):
                 continue
 
             new_cost = cost_so_far[current_node] + 1  # Assuming uniform movement cost
@@ -49,8 +76,193 @@ def find_path(start, end, grid, step):
                 heapq.heappush(frontier, (priority, neighbor))
                 came_from[neighbor] = current_node
 
+    if stats is not None:
+        # Every pop but the end's was expanded
+        stats.add_search(pops - (end in came_from), pops + len(frontier), stale_pops, peak)
     return reconstruct_path(came_from, start, end)
 
+def find_clearance_path(start, end, grid, step, radius=0, clearance_weight=0, stats=None):
+    """
+    A* like find_path, but for a drone of the given radius (in voxels): voxels closer
+    than that to a barrier are off limits, and every move costs 1 plus clearance_weight
+    times the distance field's clearance cost of the voxel moved into, so paths keep
+    away from barriers where it is cheap to. Both checks are lookups in the grid's
+    precomputed DistanceField. stats records into a SearchStats like find_path does (the
+    safety lookups count as collision checks).
+    """
+    field = distance_field(grid)
+    if radius >= field.max_distance:
+        raise ValueError("Radius must be below the distance field's max_distance.")
+    if not field.is_safe(start, radius) or not field.is_safe(end, radius):
+        return None
+
+    neighbors_of = get_neighbors_3d
+    is_safe = field.is_safe
+    if stats is not None:
+        neighbors_of = stats.timed(neighbors_of, "neighbor_time")
+        is_safe = stats.timed(is_safe, "collision_time")
+    frontier = []
+    heapq.heappush(frontier, (0, start))
+    cost_so_far = {start: 0}
+    came_from = {start: None}
+    pops = stale_pops = peak = 0
+
+    while frontier:
+        priority, current_node = heapq.heappop(frontier)
+        if stats is not None:
+            pops += 1
+            peak = max(peak, len(frontier) + 1)
+            if priority > cost_so_far[current_node] + heuristic(current_node, end):
+                stale_pops += 1
+
+        if current_node == end:
+            break
+
+        for neighbor in neighbors_of(current_node, grid, step):
+            if not is_safe(neighbor, radius):
+                continue
+
+            # The clearance term is never negative, so the heuristic stays admissible
+            new_cost = cost_so_far[current_node] + 1 + clearance_weight * field.clearance_cost(neighbor)
+            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                cost_so_far[neighbor] = new_cost
+                priority = new_cost + heuristic(neighbor, end)
+                heapq.heappush(frontier, (priority, neighbor))
+                came_from[neighbor] = current_node
+
+    if stats is not None:
+        stats.add_search(pops - (end in came_from), pops + len(frontier), stale_pops, peak)
+    return reconstruct_path(came_from, start, end)
+
+def bidirectional_find_path(start, end, grid, step, stats=None):
+    """
+    Bidirectional A*: one search from start and one from end, expanding the side with the
+    smaller frontier each time. Both use the average potential
+    p(n) = (heuristic(n, end) - heuristic(n, start)) / 2 (negated for the backward side), so
+    they see the same nonnegative reduced move costs and can stop as soon as
+    top_forward + top_backward >= the best start-to-end cost found where the two meet.
+    Returns the same path format as find_path (None if there is no path). stats records
+    into a SearchStats like find_path does, for both sides (peak_open is the larger one).
+    """
+    def potential(node):
+        return (heuristic(node, end) - heuristic(node, start)) / 2
+
+    # Index 0 searches forward from start, index 1 backward from end
+    frontiers = ([(potential(start), start)], [(-potential(end), end)])
+    costs = ({start: 0}, {end: 0})
+    came_froms = ({start: None}, {end: None})
+    closed = (set(), set())
+    signs = (1, -1)
+
+    neighbors_of = get_neighbors_3d
+    is_collision = grid.is_collision
+    if stats is not None:
+        neighbors_of = stats.timed(neighbors_of, "neighbor_time")
+        is_collision = stats.timed(is_collision, "collision_time")
+    expansions = stale_pops = peak = 0
+
+    best = 0 if start == end else math.inf
+    meeting = start if start == end else None
+    while frontiers[0] and frontiers[1]:
+        if stats is not None:
+            # The heaps only grow while a node is expanded, so their peak is seen here
+            peak = max(peak, len(frontiers[0]), len(frontiers[1]))
+        # Drop entries of nodes that were already expanded on that side
+        for side in (0, 1):
+            while frontiers[side] and frontiers[side][0][1] in closed[side]:
+                heapq.heappop(frontiers[side])
+                stale_pops += 1
+        if not frontiers[0] or not frontiers[1]:
+            break
+        if frontiers[0][0][0] + frontiers[1][0][0] >= best:
+            break  # No path through an unexpanded node can beat the best one found
+
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        frontier, cost_so_far, came_from, sign = frontiers[side], costs[side], came_froms[side], signs[side]
+        other_cost = costs[1 - side]
+
+        _, current_node = heapq.heappop(frontier)
+        closed[side].add(current_node)
+        expansions += 1
+        for neighbor in neighbors_of(current_node, grid, step):
+            if is_collision(neighbor):
+                continue
+
+            new_cost = cost_so_far[current_node] + 1  # Assuming uniform movement cost
+            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                cost_so_far[neighbor] = new_cost
+                heapq.heappush(frontier, (new_cost + sign * potential(neighbor), neighbor))
+                came_from[neighbor] = current_node
+
+                # Both searches have reached this node: a full start-to-end path exists
+                if neighbor in other_cost and new_cost + other_cost[neighbor] < best:
+                    best = new_cost + other_cost[neighbor]
+                    meeting = neighbor
+
+    if stats is not None:
+        # Every entry pushed was popped (stale or expanded) or is still queued
+        pushes = expansions + stale_pops + len(frontiers[0]) + len(frontiers[1])
+        stats.add_search(expansions, pushes, stale_pops, peak)
+    if meeting is None:
+        return None  # No path found
+    forward = reconstruct_path(came_froms[0], start, meeting)
+    backward = reconstruct_path(came_froms[1], end, meeting)
+    return forward + backward[::-1][1:]
+
+def find_paths(start, ends, grid, step, stats=None):
+    """
+    One-to-many version of find_path: a single Dijkstra expansion from start that runs
+    until every point in `ends` is settled, instead of one search per end.
+    Returns a dict mapping each end to (distance, path); unreachable ends get (inf, None).
+    stats records into a SearchStats like find_path does.
+    """
+    neighbors_of = get_neighbors_3d
+    is_collision = grid.is_collision
+    if stats is not None:
+        neighbors_of = stats.timed(neighbors_of, "neighbor_time")
+        is_collision = stats.timed(is_collision, "collision_time")
+    remaining = set(ends)
+    remaining.discard(start)
+    frontier = []
+    heapq.heappush(frontier, (0, start))
+    cost_so_far = {start: 0}
+    came_from = {start: None}
+    pops = stale_pops = peak = 0
+
+    while frontier and remaining:
+        current_cost, current_node = heapq.heappop(frontier)
+        if stats is not None:
+            pops += 1
+            peak = max(peak, len(frontier) + 1)
+        if current_cost > cost_so_far[current_node]:
+            stale_pops += 1
+            continue  # Stale entry, the node was reached more cheaply since
+
+        # Settled: its cost is final. Stop once the last end is settled.
+        remaining.discard(current_node)
+        if not remaining:
+            break
+
+        for neighbor in neighbors_of(current_node, grid, step):
+            if is_collision(neighbor):
+                continue
+
+            new_cost = current_cost + 1  # Assuming uniform movement cost
+            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                cost_so_far[neighbor] = new_cost
+                heapq.heappush(frontier, (new_cost, neighbor))
+                came_from[neighbor] = current_node
+
+    if stats is not None:
+        # The pop that settled the last end (if it was reached) wasn't expanded
+        expansions = pops - stale_pops - (pops > 0 and not remaining)
+        stats.add_search(expansions, pops + len(frontier), stale_pops, peak)
+    results = {}
+    for end in ends:
+        path = reconstruct_path(came_from, start, end) if end in came_from else None
+        results[end] = (cost_so_far[end], path) if path is not None else (math.inf, None)
+    return results
+
 # Simplified neighbor function for a 5x5x5 grid
 def get_neighbors_3d(node, grid, step):
     x, y, z = node
@@ -62,7 +274,8 @@ def get_neighbors_3d(node, grid, step):
     return neighbors
 
 def heuristic(point1, point2):
-    return np.linalg.norm(np.array(point1) - np.array(point2))
+    # Scalar math: np.linalg.norm on a 3-element array is dominated by call overhead
+    return math.dist(point1, point2)
 
 def reconstruct_path(came_from, start, end):
     path = []
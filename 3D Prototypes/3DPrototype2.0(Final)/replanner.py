@@ -0,0 +1,172 @@
+import heapq
+from pathfinding import get_neighbors_3d
+
+INF = float("inf")
+
+
+class DStarLite:
+    """
+    D* Lite incremental replanner for one leg (start -> goal) of the 3D route.
+    The search runs backwards from the goal and keeps its g/rhs values between calls,
+    so after new barriers are added (or removed) or the drone has moved along the route,
+    replan() only repairs the part of the search the change affected instead of
+    starting over like find_path does.
+    """
+
+    def __init__(self, grid, start, goal, step=1):
+        self.grid = grid
+        self.step = step
+        self.start = start
+        self.last_start = start
+        self.goal = goal
+        self.km = 0  # Heuristic offset accumulated by start moves
+        self.version = grid.version  # Grid edits up to this version are in the search state
+        self.expansions = 0
+        self.reset()
+
+    def reset(self):
+        """Forget all search state (the next replan is a full search)."""
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.open_set = []  # Heap of (key, node); outdated entries are skipped via self.keys
+        self.keys = {}
+        self.push(self.goal)
+
+    def h(self, node):
+        # Manhattan distance to the current start: exact on an empty 6-connected grid
+        return sum(abs(a - b) for a, b in zip(node, self.start))
+
+    def calculate_key(self, node):
+        best = min(self.g.get(node, INF), self.rhs.get(node, INF))
+        return best + self.h(node) + self.km, best
+
+    def push(self, node):
+        key = self.calculate_key(node)
+        self.keys[node] = key
+        heapq.heappush(self.open_set, (key, node))
+
+    def top(self):
+        # Drop heap entries whose node was requeued or removed since they were pushed
+        open_set = self.open_set
+        while open_set and self.keys.get(open_set[0][1]) != open_set[0][0]:
+            heapq.heappop(open_set)
+        return open_set[0] if open_set else None
+
+    def edges(self, node):
+        # A barrier has no usable edges; otherwise every in-bounds free neighbor costs 1
+        is_collision = self.grid.is_collision
+        if is_collision(node):
+            return []
+        return [n for n in get_neighbors_3d(node, self.grid, self.step) if not is_collision(n)]
+
+    def update_vertex(self, node):
+        if node != self.goal:
+            g = self.g
+            self.rhs[node] = min((g.get(n, INF) + 1 for n in self.edges(node)), default=INF)
+        self.keys.pop(node, None)
+        if self.g.get(node, INF) != self.rhs.get(node, INF):
+            self.push(node)
+
+    def move_start(self, start):
+        """The drone is now at `start`; keep the existing search tree."""
+        self.km += sum(abs(a - b) for a, b in zip(self.last_start, start))
+        self.start = start
+        self.last_start = start
+
+    def apply_changes(self):
+        # Pull the barrier edits made since the last replan from the grid's edit log
+        changes = self.grid.changes_since(self.version)
+        self.version = self.grid.version
+        if changes is None:
+            self.reset()
+            return
+        for node in {voxel for _, voxels in changes for voxel in voxels}:
+            # The edited cell and its neighbors (which could step into it) have new edge costs
+            self.update_vertex(node)
+            for neighbor in get_neighbors_3d(node, self.grid, self.step):
+                self.update_vertex(neighbor)
+
+    def compute_shortest_path(self):
+        g = self.g
+        rhs = self.rhs
+        start = self.start
+        while True:
+            entry = self.top()
+            if entry is None:
+                break
+            top_key, node = entry
+            if top_key >= self.calculate_key(start) and rhs.get(start, INF) == g.get(start, INF):
+                break  # The start is consistent and nothing queued can improve it
+            heapq.heappop(self.open_set)
+            del self.keys[node]
+
+            new_key = self.calculate_key(node)
+            if top_key < new_key:
+                # Key is out of date (km changed since it was queued)
+                self.push(node)
+                continue
+
+            self.expansions += 1
+            if g.get(node, INF) > rhs.get(node, INF):
+                # Overconsistent: settle it and relax its neighbors
+                g[node] = rhs[node]
+            else:
+                # Underconsistent: a cost went up, re-derive this node too
+                g[node] = INF
+                self.update_vertex(node)
+            for neighbor in get_neighbors_3d(node, self.grid, self.step):
+                self.update_vertex(neighbor)
+
+    def extract_path(self):
+        g = self.g
+        if g.get(self.start, INF) == INF:
+            return None
+        path = [self.start]
+        node = self.start
+        # Follow the cheapest neighbor down to the goal
+        while node != self.goal and len(path) <= self.grid.size ** 3:
+            node = min(self.edges(node), key=lambda n: g.get(n, INF), default=None)
+            if node is None:
+                return None  # Walled in
+            path.append(node)
+        if node != self.goal:
+            return None  # The walk hit the guard without reaching the goal
+        return path
+
+    def replan(self, start=None):
+        """
+        Bring the path up to date with barrier changes and (optionally) a new start.
+        Returns the path as a list of points, or None if the goal is unreachable.
+        """
+        self.expansions = 0
+        if start is not None and start != self.start:
+            self.move_start(start)
+        self.apply_changes()
+        self.compute_shortest_path()
+        return self.extract_path()
+
+
+def replan_3d(grid, replanners, step=1):
+    """
+    Incremental version of a_star_3d: chains start -> waypoints -> end like a_star_3d,
+    but keeps one DStarLite per leg in `replanners` (a dict owned by the caller), so
+    calling it again after barriers change only repairs the affected legs.
+    Args:
+        grid: The Grid to plan on.
+        replanners: Dict reused between calls; keyed by (leg index, leg goal).
+        step: Grid step.
+    Returns:
+        The full path as a list of points, or None if some leg has no path.
+    """
+    points = [grid.start] + list(grid.waypoints) + [grid.end]
+    full_path = []
+    for leg, (leg_start, leg_goal) in enumerate(zip(points, points[1:])):
+        planner = replanners.get((leg, leg_goal))
+        if planner is None:
+            planner = replanners[(leg, leg_goal)] = DStarLite(grid, leg_start, leg_goal, step)
+        path = planner.replan(leg_start)
+        if path is None:
+            return None  # No path found for this leg
+        full_path.extend(path[:-1])
+    full_path.append(grid.end)
+    return full_path
@@ -0,0 +1,53 @@
+import time
+
+
+class SearchStats:
+    """
+    Counters a search records when it is passed one (stats=SearchStats()); the path is
+    returned as usual and the stats are read off this object. Searches that aren't given
+    one skip all of this bookkeeping, so it costs next to nothing when off. Passing the
+    same SearchStats to several searches (e.g. the legs of a route) adds them up.
+    Attributes:
+        expansions: Nodes taken off the frontier whose neighbors were generated.
+        pushes: Entries pushed onto the frontier heap.
+        stale_pops: Heap entries popped after the node was reached more cheaply (or was
+            already expanded) since they were pushed.
+        peak_open: Largest frontier heap size seen (stale entries included).
+        neighbor_time: Seconds spent generating neighbors.
+        collision_time: Seconds spent on collision checks.
+    """
+
+    __slots__ = ("expansions", "pushes", "stale_pops", "peak_open", "neighbor_time", "collision_time")
+
+    def __init__(self):
+        self.expansions = 0
+        self.pushes = 0
+        self.stale_pops = 0
+        self.peak_open = 0
+        self.neighbor_time = 0.0
+        self.collision_time = 0.0
+
+    def timed(self, function, field):
+        """Wrap a function so the time of every call is added to the named field."""
+        perf_counter = time.perf_counter
+
+        def timed_function(*args):
+            began = perf_counter()
+            try:
+                return function(*args)
+            finally:
+                setattr(self, field, getattr(self, field) + perf_counter() - began)
+        return timed_function
+
+    def add_search(self, expansions, pushes, stale_pops, peak_open):
+        """Add the counters of one search."""
+        self.expansions += expansions
+        self.pushes += pushes
+        self.stale_pops += stale_pops
+        self.peak_open = max(self.peak_open, peak_open)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return "SearchStats(" + ", ".join(f"{name}={value:.4g}" for name, value in self.as_dict().items()) + ")"
@@ -0,0 +1,113 @@
+import weakref
+from pathfinding import find_paths
+
+INF = float("inf")
+
+# Legs found by earlier tours, per grid: {(from, to): (cost, path)} for one grid version
+_leg_caches = weakref.WeakKeyDictionary()
+
+
+def leg_matrix(grid, points, step=1, stats=None):
+    """
+    Cost matrix between all points plus the paths of every leg.
+    Each point runs one find_paths sweep to the points after it; moves cost the same in
+    both directions, so the reverse legs are the same paths backwards. Legs already in the
+    grid's cache (same grid version) are reused.
+    Returns (costs, legs) with legs[(a, b)] = (cost, path from a to b).
+    A SearchStats given as stats records the sweeps.
+    """
+    cache = _leg_caches.get(grid)
+    if cache is None or cache[0] != grid.version:
+        cache = (grid.version, {})
+        _leg_caches[grid] = cache
+    legs = cache[1]
+
+    for i, source in enumerate(points):
+        targets = [p for p in points[i + 1:] if (source, p) not in legs]
+        if not targets:
+            continue
+        for target, (cost, path) in find_paths(source, targets, grid, step, stats).items():
+            legs[(source, target)] = (cost, path)
+            legs[(target, source)] = (cost, path[::-1] if path else None)
+
+    costs = [[0 if a == b else legs[(a, b)][0] for b in points] for a in points]
+    return costs, legs
+
+
+def route_cost(costs, route):
+    return sum(costs[a][b] for a, b in zip(route, route[1:]))
+
+
+def solve_order(costs):
+    """
+    Visiting order for an open tour from point 0 to the last point through all the points
+    in between: nearest-neighbor construction improved with 2-opt and Or-opt moves until
+    neither finds a shorter route. `costs` must be symmetric.
+    Returns the route as a list of point indices, starting with 0 and ending with the last.
+    """
+    n = len(costs)
+    last = n - 1
+
+    # Nearest neighbor from the start
+    route = [0]
+    unvisited = set(range(1, last))
+    while unvisited:
+        nearest = min(unvisited, key=lambda p: costs[route[-1]][p])
+        route.append(nearest)
+        unvisited.remove(nearest)
+    if last > 0:
+        route.append(last)
+
+    improved = True
+    while improved:
+        improved = False
+
+        # 2-opt: reverse route[i..j] if reconnecting its ends is shorter
+        for i in range(1, len(route) - 2):
+            for j in range(i + 1, len(route) - 1):
+                a, b, c, d = route[i - 1], route[i], route[j], route[j + 1]
+                if costs[a][c] + costs[b][d] < costs[a][b] + costs[c][d] - 1e-9:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    improved = True
+
+        # Or-opt: move a run of 1-3 points (possibly reversed) to another gap of the route
+        for length in (1, 2, 3):
+            i = 1
+            while i + length < len(route):
+                segment = route[i:i + length]
+                a, b = route[i - 1], route[i + length]
+                removed = costs[a][segment[0]] + costs[segment[-1]][b] - costs[a][b]
+                rest = route[:i] + route[i + length:]
+                best = None
+                for k in range(len(rest) - 1):
+                    c, d = rest[k], rest[k + 1]
+                    for candidate in (segment, segment[::-1]):
+                        added = costs[c][candidate[0]] + costs[candidate[-1]][d] - costs[c][d]
+                        if added < removed - 1e-9 and (best is None or added < best[0]):
+                            best = (added, k, candidate)
+                if best is not None:
+                    _, k, candidate = best
+                    route = rest[:k + 1] + candidate + rest[k + 1:]
+                    improved = True
+                i += 1
+
+    return route
+
+
+def plan_tour(grid, step=1, stats=None):
+    """
+    Like a_star_3d, but visits grid.waypoints in the order that minimizes the total path
+    length instead of the order they were added. stats is passed on to find_paths.
+    Returns the stitched path as a list of points, or None if some point can't be reached.
+    """
+    points = [grid.start] + list(grid.waypoints) + [grid.end]
+    costs, legs = leg_matrix(grid, points, step, stats)
+    if any(cost == INF for cost in costs[0]):
+        return None  # Some waypoint or the end is unreachable
+
+    route = solve_order(costs)
+    full_path = [points[0]]
+    for a, b in zip(route, route[1:]):
+        if points[a] != points[b]:
+            full_path.extend(legs[(points[a], points[b])][1][1:])
+    return full_path